@@ -1,82 +1,279 @@
 import pygame
 import sys
 import math
-import random
+import collections
+import hashlib
 import sqlite3
+import io
+import json
+import mmap
+import struct
+import threading
+import queue
+import time
 import os
 from datetime import datetime
 from pygame import joystick
+import numpy as np
 
-# Initialize pygame
-pygame.init()
-
-# Initialize sound mixer
-pygame.mixer.pre_init(44100, -16, 2, 512)  # Setup for low sound latency
-pygame.mixer.init()
-
-# Load sound effects
-sounds = {
-    'shoot': pygame.mixer.Sound('sounds/shoot.wav'),
-    'explosion_large': pygame.mixer.Sound('sounds/explosion_large.wav'),
-    'explosion_medium': pygame.mixer.Sound('sounds/explosion_medium.wav'),
-    'explosion_small': pygame.mixer.Sound('sounds/explosion_small.wav'),
-    'player_explosion': pygame.mixer.Sound('sounds/player_explosion.wav'),
-    'ufo': pygame.mixer.Sound('sounds/ufo.wav'),
-    'ufo_shoot': pygame.mixer.Sound('sounds/ufo_shoot.wav'),
-    'powerup': pygame.mixer.Sound('sounds/powerup.wav'),
-    'laser': pygame.mixer.Sound('sounds/laser.wav'),
-    'nuke': pygame.mixer.Sound('sounds/nuke.wav'),
-    'thrust': pygame.mixer.Sound('sounds/thrust.wav'),
-    'menu_select': pygame.mixer.Sound('sounds/menu_select.wav'),
-    'menu_change': pygame.mixer.Sound('sounds/menu_change.wav'),
-    'nuke_fire': pygame.mixer.Sound('sounds/nuke_fire.wav'),
-    'ufo_explosion': pygame.mixer.Sound('sounds/ufo_explosion.wav'),
+# Headless mode runs the simulation without a window or sound mixer
+# (benchmarks, batch runs and build machines without a screen)
+HEADLESS = os.environ.get('ASTEROIDS_HEADLESS') == '1'
+HEADLESS_RESOLUTION = (1920, 1080)
+
+# Mixer format: 44.1 kHz, signed 16-bit, stereo, with a small buffer for low latency
+MIXER_FREQUENCY = 44100
+MIXER_SIZE = -16
+MIXER_CHANNELS = 2
+MIXER_BUFFER = 512
+
+# Sound effects and their volumes; frequent sounds are a little quieter
+SOUND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sounds')
+SOUND_VOLUMES = {
+    'shoot': 0.4, 'ufo_shoot': 0.4, 'laser': 0.4, 'thrust': 0.4,
+    'explosion_large': 0.6, 'explosion_medium': 0.6, 'explosion_small': 0.6,
+    'player_explosion': 0.6, 'powerup': 0.6, 'nuke': 0.6,
+    'menu_select': 0.5, 'menu_change': 0.5,
+    'ufo': 1.0, 'nuke_fire': 1.0, 'ufo_explosion': 1.0,
 }
+# How sounds compete for mixer channels: (priority, most copies playing at
+# once, whether it plays on a reserved channel). Reserved sounds are the long
+# ones the game stops itself, so they never lose their channel to effects.
+VOICE_CHANNELS = 16
+SOUND_VOICES = {
+    'nuke': (10, 1, False), 'player_explosion': (8, 2, False), 'ufo_explosion': (7, 1, False),
+    'explosion_large': (6, 3, False), 'powerup': (6, 2, False),
+    'explosion_medium': (5, 3, False), 'laser': (5, 1, False), 'menu_select': (5, 1, False),
+    'explosion_small': (4, 3, False), 'menu_change': (4, 1, False),
+    'ufo_shoot': (3, 2, False), 'shoot': (2, 3, False), 'thrust': (1, 1, False),
+    'nuke_fire': (9, 2, True), 'ufo': (3, 1, True),
+}
+SOUND_ARCHIVE = os.path.join(SOUND_DIR, 'effects.pak')  # Built by pack_sounds.py
+sounds = {}  # Filled by a SoundLoader; sounds not loaded yet are simply not played
+
+class SoundArchive:
+    """Sound effects packed into one memory-mapped file of ready-to-play PCM"""
+    MAGIC = b'ASND'
+    VERSION = 1
+    ALIGNMENT = 16
+    # Magic, version, mixer frequency, sample size and channels, entry count;
+    # one ENTRY (name, offset, length) per sound follows, then the samples
+    # themselves, each aligned to ALIGNMENT
+    HEADER = struct.Struct('<4sHIhHI')
+    ENTRY = struct.Struct('<32sQQ')
+    
+    def __init__(self, path=SOUND_ARCHIVE):
+        with open(path, 'rb') as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, frequency, size, channels, count = self.HEADER.unpack_from(self.map, 0)
+        if magic != self.MAGIC or version != self.VERSION:
+            self.map.close()
+            raise ValueError(f"{path} is not a version {self.VERSION} sound archive")
+        self.mixer_format = (frequency, size, channels)
+        self.entries = {}  # name -> (offset, length)
+        for i in range(count):
+            name, offset, length = self.ENTRY.unpack_from(self.map, self.HEADER.size + i * self.ENTRY.size)
+            self.entries[name.rstrip(b'\0').decode()] = (offset, length)
+            
+    def view(self, name):
+        offset, length = self.entries[name]
+        return memoryview(self.map)[offset:offset + length]
+        
+    def close(self):
+        self.map.close()
+        
+    @classmethod
+    def write(cls, path, mixer_format, samples):
+        """Pack a {name: raw PCM bytes} dict recorded in mixer_format"""
+        offset = cls.HEADER.size + len(samples) * cls.ENTRY.size
+        index = []
+        for name, data in samples.items():
+            offset += -offset % cls.ALIGNMENT
+            index.append((name, offset, len(data)))
+            offset += len(data)
+        with open(path, 'wb') as f:
+            f.write(cls.HEADER.pack(cls.MAGIC, cls.VERSION, *mixer_format, len(samples)))
+            for name, offset, length in index:
+                f.write(cls.ENTRY.pack(name.encode(), offset, length))
+            for (name, offset, length), data in zip(index, samples.values()):
+                f.write(bytes(offset - f.tell()))
+                f.write(data)
+
+class SoundLoader(threading.Thread):
+    """Loads the sound effects into sounds on a worker thread, from the archive or WAV files"""
+    def __init__(self, names=SOUND_VOLUMES, directory=SOUND_DIR, archive=SOUND_ARCHIVE):
+        super().__init__(name='sound-loader', daemon=True)
+        self.names = list(names)
+        self.directory = directory
+        self.archive = archive
+        self.source = None  # 'archive' or 'wav' once loading starts
+        self.timings = {}  # name -> seconds, for every asset tried so far
+        self.failed = {}  # name -> error
+        self.elapsed = None  # Total seconds once finished
+        
+    def open_archive(self):
+        """The sound archive, if there is one the mixer can play as is"""
+        try:
+            archive = SoundArchive(self.archive)
+        except (OSError, ValueError, struct.error):
+            return None
+        if archive.mixer_format != pygame.mixer.get_init():
+            archive.close()
+            return None
+        return archive
+        
+    def decode(self, name, archive):
+        if archive is not None and name in archive.entries:
+            view = archive.view(name)
+            try:
+                return pygame.mixer.Sound(buffer=view)  # pygame keeps its own copy of the samples
+            finally:
+                view.release()
+        with open(os.path.join(self.directory, name + '.wav'), 'rb') as f:
+            data = f.read()
+        return pygame.mixer.Sound(file=io.BytesIO(data))
+        
+    def run(self):
+        start = time.perf_counter()
+        archive = self.open_archive()
+        self.source = 'archive' if archive is not None else 'wav'
+        for name in self.names:
+            began = time.perf_counter()
+            try:
+                sound = self.decode(name, archive)
+                sound.set_volume(SOUND_VOLUMES.get(name, 1.0))
+                sounds[name] = sound
+            except (OSError, pygame.error) as e:
+                self.failed[name] = e
+            self.timings[name] = time.perf_counter() - began
+        if archive is not None:
+            archive.close()
+        self.elapsed = time.perf_counter() - start
+        self.report()
+        
+    @property
+    def done(self):
+        return self.elapsed is not None
+        
+    def progress(self):
+        """Fraction of the assets tried so far"""
+        return len(self.timings) / len(self.names) if self.names else 1.0
+        
+    def report(self):
+        print(f"Loaded {len(self.timings) - len(self.failed)} of {len(self.names)} sounds "
+              f"from {self.source} in {self.elapsed * 1000:.1f} ms")
+        for name, seconds in sorted(self.timings.items(), key=lambda item: -item[1]):
+            status = f" FAILED: {self.failed[name]}" if name in self.failed else ""
+            print(f"  {name}: {seconds * 1000:.1f} ms{status}")
+
+class VoiceManager:
+    """Shares a fixed pool of mixer channels among sound requests by priority"""
+    def __init__(self, channels=VOICE_CHANNELS, voices=SOUND_VOICES):
+        self.voices = voices
+        reserved = sum(limit for _, limit, is_reserved in voices.values() if is_reserved)
+        pygame.mixer.set_num_channels(channels)
+        pygame.mixer.set_reserved(reserved)  # Keep plain Sound.play() off them too
+        self.reserved = [pygame.mixer.Channel(i) for i in range(reserved)]
+        self.pool = [pygame.mixer.Channel(i) for i in range(reserved, channels)]
+        self.playing = {}  # Channel -> (sound name, priority, start order) of what we last started on it
+        self.started = 0
+        self.requests = {}  # Sound name -> loops, for this frame
+        
+    def play(self, name, loops=0):
+        if self.voices.get(name, (0, 1, False))[2]:
+            return self.play_reserved(name, loops)
+        self.requests[name] = max(loops, self.requests.get(name, loops))
+        return None
+        
+    def play_reserved(self, name, loops):
+        limit = self.voices[name][1]
+        mine = [channel for channel in self.reserved if self.playing.get(channel, (None,))[0] == name]
+        free = [channel for channel in self.reserved if not channel.get_busy() and channel not in mine]
+        idle = [channel for channel in mine if not channel.get_busy()]
+        if idle:
+            channel = idle[0]
+        elif len(mine) < limit and free:
+            channel = free[0]
+        elif mine:
+            channel = min(mine, key=lambda channel: self.playing[channel][2])  # Restart the oldest
+        else:
+            return None
+        self.start(channel, name, loops)
+        return channel
+        
+    def start(self, channel, name, loops):
+        channel.play(sounds[name], loops)
+        self.started += 1
+        self.playing[channel] = (name, self.voices.get(name, (0,))[0], self.started)
+        
+    def flush(self):
+        """Start this frame's requests"""
+        if not self.requests:
+            return
+        busy = {channel: self.playing[channel] for channel in self.pool
+                if channel in self.playing and channel.get_busy()}
+        for name in sorted(self.requests, key=lambda name: -self.voices.get(name, (0,))[0]):
+            priority, limit = self.voices.get(name, (0, 1, False))[:2]
+            if sum(1 for voice in busy.values() if voice[0] == name) >= limit:
+                continue
+            channel = next((channel for channel in self.pool if channel not in busy), None)
+            if channel is None:
+                # Take over the oldest of the lowest-priority voices, if it ranks below this one
+                channel = min(busy, key=lambda channel: busy[channel][1:])
+                if busy[channel][1] >= priority:
+                    continue
+            self.start(channel, name, self.requests[name])
+            busy[channel] = self.playing[channel]
+        self.requests.clear()
+        
+    def cancel(self, name=None):
+        """Forget requests not started yet, for one sound or all"""
+        if name is None:
+            self.requests.clear()
+        else:
+            self.requests.pop(name, None)
+
+voices = None  # VoiceManager, made by create_app once the mixer is up
 
 # Sound management functions
 def play_sound(sound_name, loops=0):
-    """Play a sound by name with optional looping"""
-    if sound_name in sounds:
-        sounds[sound_name].play(loops)
+    """Ask for a sound; effects start in voices.flush(), reserved ones now and return their channel"""
+    if voices is None or sound_name not in sounds:
+        return None
+    return voices.play(sound_name, loops)
         
 def stop_sound(sound_name):
     """Stop a specific sound"""
+    if voices is not None:
+        voices.cancel(sound_name)
     if sound_name in sounds:
         sounds[sound_name].stop()
         
 def stop_all_sounds():
     """Stop all currently playing sounds"""
-    pygame.mixer.stop()
-
-# Set volume levels for different sound categories
-for sound in ['shoot', 'ufo_shoot', 'laser', 'thrust']:
-    sounds[sound].set_volume(0.4)  # Slightly lower volume for frequent sounds
-
-for sound in ['explosion_large', 'explosion_medium', 'explosion_small', 'player_explosion', 'powerup', 'nuke']:
-    sounds[sound].set_volume(0.6)  # Medium volume for effects
+    if voices is not None:
+        voices.cancel()
+    if pygame.mixer.get_init():
+        pygame.mixer.stop()
 
-for sound in ['menu_select', 'menu_change']:
-    sounds[sound].set_volume(0.5)  # Menu sounds
-
-# Get the actual display resolution
-info = pygame.display.Info()
-DISPLAY_WIDTH, DISPLAY_HEIGHT = info.current_w, info.current_h
-
-# Game logic uses pixel-perfect dimensions that match your actual screen
-# but maintain the 16:9 aspect ratio
-target_width = DISPLAY_WIDTH
-target_height = int(DISPLAY_WIDTH * 9 / 16)
-
-if target_height > DISPLAY_HEIGHT:
-    # If height is too large, calculate based on height instead
-    target_height = DISPLAY_HEIGHT
-    target_width = int(DISPLAY_HEIGHT * 16 / 9)
-
-WIDTH, HEIGHT = target_width, target_height
+def letterbox(display_width, display_height):
+    """The 16:9 playfield for a display, and the offset that centers it there"""
+    # Game logic uses pixel-perfect dimensions that match your actual screen
+    # but maintain the 16:9 aspect ratio
+    width = display_width
+    height = int(display_width * 9 / 16)
+    
+    if height > display_height:
+        # If height is too large, calculate based on height instead
+        height = display_height
+        width = int(display_height * 16 / 9)
+        
+    return width, height, (display_width - width) // 2, (display_height - height) // 2
 
-# Calculate offsets to center the game on screen
-OFFSET_X = (DISPLAY_WIDTH - WIDTH) // 2
-OFFSET_Y = (DISPLAY_HEIGHT - HEIGHT) // 2
+# Display geometry. create_app sets it for the real display; until then the
+# simulation runs on the headless playfield, so tools need no window
+DISPLAY_WIDTH, DISPLAY_HEIGHT = HEADLESS_RESOLUTION
+WIDTH, HEIGHT, OFFSET_X, OFFSET_Y = letterbox(DISPLAY_WIDTH, DISPLAY_HEIGHT)
 
 # Colors
 BLACK = (0, 0, 0)
@@ -90,12 +287,21 @@ GREY = (192, 192, 192)
 CYAN = (0, 255, 255)  # Color for player 2
 FPS = 60
 
+# Simulation rate. Movement constants are tuned per frame at BASE_TICK_RATE,
+# other tick rates scale them so game speed stays the same.
+BASE_TICK_RATE = 60
+TICK_RATE = int(os.environ.get('ASTEROIDS_TICK_RATE', BASE_TICK_RATE))  # e.g. 60, 120 or 240
+MAX_FRAME_TIME = 0.25  # Longest frame (in seconds) the simulation catches up on
+DIRTY_RECTS = os.environ.get('ASTEROIDS_DIRTY_RECTS') == '1'  # Present only changed areas during play
+DIRTY_RECT_THRESHOLD = 0.4  # Fraction of the screen above which a full-frame redraw is cheaper
+
 # Game states
 TITLE_SCREEN = 0
 GAME_PLAYING = 1
 GAME_OVER = 2
 HIGH_SCORES = 3
 NAME_INPUT = 4
+LOADING = 5
 
 # Game modes
 SINGLE_PLAYER = 0
@@ -108,20 +314,41 @@ POWERUP_SPAWN_RATE = 10
 AFTERIMAGE_FREQUENCY = 5  # Frames between each after-image (lower = more images)
 AFTERIMAGE_DURATION = 30  # How long after-images last in frames
 
+# Shot timing (in milliseconds)
+SHOT_COOLDOWN = 250
+RAPID_FIRE_COOLDOWN = 100
+
+# UFO spawn delay range (in milliseconds)
+UFO_SPAWN_DELAY_RANGE = (10000, 20000)
+
+# Player input bits, one bitmask per player per tick
+INPUT_LEFT = 1
+INPUT_RIGHT = 2
+INPUT_THRUST = 4
+INPUT_FIRE = 8        # Fire button pressed this tick
+INPUT_FIRE_HELD = 16  # Fire button held down (rapid fire)
+
 # Controller settings
 CONTROLLER_DEADZONE = 0.2  # Analog stick deadzone
 CONTROLLER_REPEAT_DELAY = 200  # Milliseconds
 
-# Set up the display
-screen = pygame.display.set_mode((DISPLAY_WIDTH, DISPLAY_HEIGHT), pygame.FULLSCREEN)
-game_surface = pygame.Surface((WIDTH, HEIGHT))
-pygame.display.set_caption("aSteroids")
-clock = pygame.time.Clock()
+# Presentation: 'direct' draws straight into the letterboxed region of the
+# display, 'copy' draws off-screen and blits the frame to the display
+PRESENT_MODE = os.environ.get('ASTEROIDS_PRESENT', 'direct')
+
+# How create_app sets up pygame; the defaults come from the environment
+AppConfig = collections.namedtuple('AppConfig', 'headless resolution present_mode fullscreen',
+                                   defaults=(HEADLESS, None, PRESENT_MODE, True))
+App = collections.namedtuple('App', 'config screen game_surface clock')
 
-# Load fonts
-font = pygame.font.Font(None, 36)
-title_font = pygame.font.Font(None, 72)
-big_font = pygame.font.Font(None, 48)
+# Display, drawing surface, frame clock and fonts, all made by create_app
+screen = None
+game_surface = None
+clock = None
+font = None
+title_font = None
+big_font = None
+small_font = None
 
 def init_controllers():
     """Initialize all connected controllers"""
@@ -141,13 +368,13 @@ def init_controllers():
     return controllers
 
 # Database setup
-def init_database():
-    """Initialize the high scores database"""
-    db_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'asteroids_scores.db')
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    
-    # Create table if it doesn't exist - add game_mode column
+SCORES_DB = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'asteroids_scores.db')
+
+def unsaved_scores_path(path):
+    """Where a ScoreWriter keeps scores it could not commit to the database at path"""
+    return path + '.unsaved'
+
+def create_scores_table(cursor):
     cursor.execute('''
     CREATE TABLE IF NOT EXISTS high_scores (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -157,44 +384,404 @@ def init_database():
         game_mode TEXT DEFAULT 'single'
     )
     ''')
-    
-    # Check if game_mode column exists, add it if it doesn't
+    # Databases from before coop mode lack the game_mode column
     cursor.execute("PRAGMA table_info(high_scores)")
-    columns = cursor.fetchall()
-    column_names = [col[1] for col in columns]
-    
-    if 'game_mode' not in column_names:
+    if 'game_mode' not in [col[1] for col in cursor.fetchall()]:
         cursor.execute("ALTER TABLE high_scores ADD COLUMN game_mode TEXT DEFAULT 'single'")
-    
-    conn.commit()
-    conn.close()
-    
-    return db_path
 
-def save_score(db_path, name, score, game_mode='single'):
-    """Save a score to the database"""
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    
-    # Get current date and time
-    date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    
-    cursor.execute("INSERT INTO high_scores (name, score, date, game_mode) VALUES (?, ?, ?, ?)",
-                  (name, score, date, game_mode))
+def index_scores_by_mode(cursor):
+    cursor.execute("CREATE INDEX IF NOT EXISTS high_scores_mode_score ON high_scores (game_mode, score DESC)")
+
+def count_scores_by_value(cursor):
+    # How many rows each game mode has at each score, kept up to date by triggers
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS score_counts (
+        game_mode TEXT NOT NULL,
+        score INTEGER NOT NULL,
+        count INTEGER NOT NULL,
+        PRIMARY KEY (game_mode, score)
+    ) WITHOUT ROWID
+    ''')
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS score_counts_insert AFTER INSERT ON high_scores
+    WHEN new.game_mode IS NOT NULL BEGIN
+        INSERT OR IGNORE INTO score_counts VALUES (new.game_mode, new.score, 0);
+        UPDATE score_counts SET count = count + 1 WHERE game_mode = new.game_mode AND score = new.score;
+    END
+    ''')
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS score_counts_delete AFTER DELETE ON high_scores
+    WHEN old.game_mode IS NOT NULL BEGIN
+        UPDATE score_counts SET count = count - 1 WHERE game_mode = old.game_mode AND score = old.score;
+    END
+    ''')
+    cursor.execute("DELETE FROM score_counts")
+    cursor.execute("INSERT INTO score_counts SELECT game_mode, score, COUNT(*) FROM high_scores "
+                   "WHERE game_mode IS NOT NULL GROUP BY game_mode, score")
+
+class Leaderboard:
+    """In-memory best scores per game mode, re-read only when another connection wrote"""
+    def __init__(self, store, size=10):
+        self.store = store
+        self.size = size  # Rows kept per game mode
+        self.modes = {}  # game_mode -> rows sorted best first
+        self.pending = []  # Submitted rows not yet committed
+        self.version = None  # data_version as of our last read, None to force one
+        self.cached = None  # Merged top rows, rebuilt when a mode changes
+        
+    def is_current(self):
+        return self.version is not None and self.version == self.store.data_version()
+        
+    def load(self):
+        """Read the top rows of every game mode from the database"""
+        self.modes = {}
+        # Step from one game mode to the next through the index instead of scanning for DISTINCT
+        game_mode = self.store.execute(ScoreStore.SELECT_FIRST_MODE).fetchone()[0]
+        while game_mode is not None:
+            self.modes[game_mode] = self.store.execute(ScoreStore.SELECT_TOP_FOR_MODE, (game_mode, self.size)).fetchall()
+            game_mode = self.store.execute(ScoreStore.SELECT_NEXT_MODE, (game_mode,)).fetchone()[0]
+        self.version = self.store.data_version()
+        for row in self.pending:
+            self.insert(row)
+        self.cached = None
+        
+    def insert(self, row):
+        rows = self.modes.setdefault(row[3], [])
+        # Rows are sorted by descending score; equal scores keep insertion order
+        index = len(rows)
+        while index > 0 and rows[index - 1][1] < row[1]:
+            index -= 1
+        if index < self.size:
+            rows.insert(index, row)
+            del rows[self.size:]
+            self.cached = None
+            
+    def add(self, row):
+        """Show a just-submitted (name, score, date, game_mode) row"""
+        self.pending.append(row)
+        if self.version is not None:
+            self.insert(row)  # Otherwise the first load puts it in
+            
+    def committed(self, rows, saved=True):
+        """The writer is done with these rows; later loads read them from the table if saved"""
+        for row in rows:
+            self.pending.remove(row)
+        if not saved:
+            self.version = None  # Drop them from the cached top on the next read
+            
+    def top(self, limit=10, reload=True, game_mode=None):
+        """Best scores in one game mode or all; reload=False skips checking the table for changes"""
+        if limit > self.size:
+            self.size = limit
+            self.version = None
+        if reload and not self.is_current():
+            self.load()
+        if game_mode is not None:
+            return self.modes.get(game_mode, [])[:limit]
+        if self.cached is None or len(self.cached) < limit:
+            merged = sorted((row for rows in self.modes.values() for row in rows), key=lambda row: -row[1])
+            self.cached = merged[:self.size]
+        return self.cached[:limit]
+
+class ScoreRanks:
+    """Ranks scores within their game mode by binary search over the score_counts table"""
+    def __init__(self, store):
+        self.store = store
+        self.modes = {}  # game_mode -> (ascending scores, number of scores at or above each)
+        self.version = None
+        
+    def load(self):
+        histogram = collections.defaultdict(lambda: ([], []))
+        for game_mode, score, count in self.store.execute(ScoreStore.SELECT_SCORE_COUNTS):
+            values, counts = histogram[game_mode]
+            values.append(score)
+            counts.append(count)
+        self.modes = {}
+        for game_mode, (values, counts) in histogram.items():
+            counts = np.array(counts, dtype=np.int64)
+            self.modes[game_mode] = (np.array(values, dtype=np.int64), np.cumsum(counts[::-1])[::-1])
+        self.version = self.store.data_version()
+        
+    def rank(self, score, game_mode):
+        """Place a score would take in its game mode: 1 + the saved scores beating it"""
+        if self.version != self.store.data_version():
+            self.load()
+        if game_mode not in self.modes:
+            return 1
+        values, at_or_above = self.modes[game_mode]
+        index = int(np.searchsorted(values, score, side='right'))
+        return 1 + (int(at_or_above[index]) if index < len(values) else 0)
+        
+    def total(self, game_mode):
+        """Number of saved scores in a game mode"""
+        if self.version != self.store.data_version():
+            self.load()
+        return int(self.modes[game_mode][1][0]) if game_mode in self.modes else 0
+
+class ScoreWriter(threading.Thread):
+    """Commits queued score submissions on a thread of its own"""
+    BUSY_TIMEOUT = 1.0  # Seconds one attempt waits for another connection's lock
+    RETRY_DELAY = 0.5  # Seconds between attempts while the database is locked
+    MAX_ATTEMPTS = 10
     
-    conn.commit()
-    conn.close()
+    def __init__(self, path, synchronous='NORMAL'):
+        # Not a daemon: interpreter exit waits for the last commit instead of killing it
+        super().__init__(name='score-writer')
+        self.path = path
+        self.spill_path = unsaved_scores_path(path)
+        self.synchronous = synchronous
+        self.submissions = queue.Queue()  # Lists of rows, then None once closed
+        self.finished = queue.Queue()  # (rows, saved) for every submission handled
+        self.pending = 0  # Submissions not yet reported by completed(); UI thread only
+        self.commit_lock = threading.Lock()
+        self.closed = False
+        self.unsaved = []  # Rows given up on and spilled for the next start
+        
+    def submit(self, rows):
+        if self.closed:
+            raise RuntimeError("score writer is closed")
+        self.pending += 1
+        self.submissions.put(rows)
+        
+    def completed(self):
+        """(rows, saved) for each submission committed or given up on since the last call"""
+        done = []
+        while True:
+            try:
+                done.append(self.finished.get_nowait())
+            except queue.Empty:
+                break
+        self.pending -= len(done)
+        return done
+        
+    @staticmethod
+    def is_transient(error):
+        """Whether an error only means another connection holds the lock"""
+        return isinstance(error, sqlite3.OperationalError) and ('locked' in str(error) or 'busy' in str(error))
+        
+    def next_batch(self):
+        """Wait for submissions and take all that are queued, None once the game has gone"""
+        while True:
+            try:
+                batch = [self.submissions.get(timeout=0.5)]
+                break
+            except queue.Empty:
+                # The game ended without close(); nothing more can arrive
+                if not threading.main_thread().is_alive():
+                    return None
+        while True:
+            try:
+                batch.append(self.submissions.get_nowait())
+            except queue.Empty:
+                return batch
+        
+    def run(self):
+        # sqlite3 connections belong to the thread that opened them
+        try:
+            conn = sqlite3.connect(self.path, timeout=self.BUSY_TIMEOUT)
+            conn.execute(f"PRAGMA synchronous={self.synchronous}")
+        except sqlite3.Error as e:
+            print(f"Could not open the score database: {e}")
+            conn = None
+        stopping = False
+        while not stopping:
+            batch = self.next_batch() or [None]
+            # Nothing is accepted after close(), so its None always ends the batch
+            stopping = batch[-1] is None
+            batch = [rows for rows in batch if rows is not None]
+            if batch:
+                saved = conn is not None and self.commit(conn, batch)
+                if not saved:
+                    self.spill(batch)
+                    for rows in batch:
+                        self.finished.put((rows, False))
+        if conn is not None:
+            conn.close()
+            
+    def commit(self, conn, batch):
+        """Save a batch in one transaction, retrying while the database is locked"""
+        for attempt in range(1, self.MAX_ATTEMPTS + 1):
+            try:
+                with self.commit_lock:
+                    with conn:
+                        conn.executemany(ScoreStore.INSERT_SCORE, [row for rows in batch for row in rows])
+                    for rows in batch:
+                        self.finished.put((rows, True))
+                return True
+            except sqlite3.Error as e:
+                if not self.is_transient(e) or attempt == self.MAX_ATTEMPTS:
+                    print(f"Could not save scores: {e}")
+                    return False
+                print(f"Could not save scores, retrying: {e}")
+                time.sleep(self.RETRY_DELAY)
+                
+    def spill(self, batch):
+        """Keep rows the database refused in a file ScoreStore re-queues on the next start"""
+        rows = [row for rows in batch for row in rows]
+        try:
+            with open(self.spill_path, 'a') as f:
+                for row in rows:
+                    f.write(json.dumps(row) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+            print(f"Kept {len(rows)} unsaved scores in {self.spill_path} for next time")
+        except OSError as e:
+            print(f"Lost {len(rows)} scores ({e}): " + ", ".join(f"{row[0]} {row[1]}" for row in rows))
+        self.unsaved.extend(rows)
+                
+    def close(self):
+        """Commit or spill everything submitted so far, stop the thread and return the spilled rows"""
+        if not self.closed:
+            self.closed = True
+            self.submissions.put(None)
+        self.join()
+        return self.unsaved
 
-def get_high_scores(db_path, limit=10):
-    """Get the top scores from the database"""
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
+class ScoreStore:
+    """The high score database; reads run here, writes go through a ScoreWriter"""
+    MIGRATIONS = [
+        create_scores_table,   # 1: the original table, with game_mode
+        index_scores_by_mode,  # 2: top scores per mode without a table scan
+        count_scores_by_value,  # 3: ranks without counting rows
+    ]
+    INSERT_SCORE = "INSERT INTO high_scores (name, score, date, game_mode) VALUES (?, ?, ?, ?)"
+    SELECT_FIRST_MODE = "SELECT MIN(game_mode) FROM high_scores"
+    SELECT_NEXT_MODE = "SELECT MIN(game_mode) FROM high_scores WHERE game_mode > ?"
+    SELECT_TOP_FOR_MODE = ("SELECT name, score, date, game_mode FROM high_scores WHERE game_mode = ? "
+                           "ORDER BY score DESC LIMIT ?")
+    SELECT_SCORE_COUNTS = "SELECT game_mode, score, count FROM score_counts WHERE count > 0 ORDER BY game_mode, score"
+    SELECT_FIRST_PAGE = ("SELECT id, name, score, date, game_mode FROM high_scores WHERE game_mode = ? "
+                         "ORDER BY score DESC, id LIMIT ?")
+    # The rest of the cursor's score, then lower scores: two index ranges, however deep the page
+    SELECT_NEXT_PAGE = ("SELECT * FROM (SELECT id, name, score, date, game_mode FROM high_scores "
+                        "WHERE game_mode = :mode AND score = :score AND id > :id ORDER BY id LIMIT :limit) "
+                        "UNION ALL SELECT * FROM (SELECT id, name, score, date, game_mode FROM high_scores "
+                        "WHERE game_mode = :mode AND score < :score ORDER BY score DESC, id LIMIT :limit) "
+                        "ORDER BY score DESC, id LIMIT :limit")
     
-    cursor.execute("SELECT name, score, date, game_mode FROM high_scores ORDER BY score DESC LIMIT ?", (limit,))
-    scores = cursor.fetchall()
+    def __init__(self, path=SCORES_DB, synchronous='NORMAL'):
+        self.path = path
+        self.conn = sqlite3.connect(path, cached_statements=32)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(f"PRAGMA synchronous={synchronous}")
+        self.migrate()
+        self.restore_unsaved()
+        self.leaderboard = Leaderboard(self)
+        self.ranks = ScoreRanks(self)
+        self.writer = ScoreWriter(path, synchronous)
+        self.writer.start()
+        
+    def execute(self, sql, parameters=()):
+        return self.conn.execute(sql, parameters)
+        
+    def restore_unsaved(self):
+        """Save the rows a ScoreWriter spilled last time; the file stays until they are committed"""
+        path = unsaved_scores_path(self.path)
+        try:
+            with open(path) as f:
+                rows = [tuple(json.loads(line)) for line in f if line.strip()]
+            with self.conn:
+                self.conn.executemany(self.INSERT_SCORE, rows)
+            os.remove(path)
+            print(f"Saved {len(rows)} scores left over from last time")
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, sqlite3.Error) as e:
+            print(f"Could not restore unsaved scores from {path}: {e}")
+        
+    def data_version(self):
+        """Changes whenever another connection commits to the database"""
+        return self.conn.execute("PRAGMA data_version").fetchone()[0]
+        
+    def migrate(self):
+        """Bring the schema up to date, one transaction per migration"""
+        version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        for number, migration in enumerate(self.MIGRATIONS[version:], version + 1):
+            self.conn.execute("BEGIN")  # sqlite3 would otherwise autocommit the DDL
+            with self.conn:
+                migration(self.conn.cursor())
+                self.conn.execute(f"PRAGMA user_version={number}")
+                
+    def submit_scores(self, entries):
+        """Queue (name, score, game_mode) entries to save in one transaction; they show at once"""
+        # Get current date and time
+        date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        rows = [(name, score, date, game_mode) for name, score, game_mode in entries]
+        
+        for row in rows:
+            self.leaderboard.add(row)
+        self.writer.submit(rows)
+        
+    def save_score(self, name, score, game_mode='single'):
+        """Save a score to the database"""
+        self.submit_scores([(name, score, game_mode)])
+        
+    def collect_committed(self):
+        for rows, saved in self.writer.completed():
+            self.leaderboard.committed(rows, saved)
+            
+    def saving(self):
+        """Whether submitted scores are still waiting to be committed"""
+        self.collect_committed()
+        return self.writer.pending > 0
+        
+    def high_scores(self, limit=10, game_mode=None):
+        """Get the top scores of one game mode or all, reading the database only when it changed"""
+        # Mid-commit the table and the pending rows disagree; keep showing the
+        # cache unless there is nothing cached yet
+        if not self.writer.commit_lock.acquire(blocking=self.leaderboard.version is None):
+            return self.leaderboard.top(limit, reload=False, game_mode=game_mode)
+        try:
+            self.collect_committed()
+            return self.leaderboard.top(limit, game_mode=game_mode)
+        finally:
+            self.writer.commit_lock.release()
+            
+    def page(self, game_mode, after=None, limit=10):
+        """(rows, cursor to pass as after for the next page or None) of a mode's scores, best first"""
+        if after is None:
+            rows = self.execute(self.SELECT_FIRST_PAGE, (game_mode, limit)).fetchall()
+        else:
+            score, row_id = after
+            rows = self.execute(self.SELECT_NEXT_PAGE,
+                                {'mode': game_mode, 'score': score, 'id': row_id, 'limit': limit}).fetchall()
+        cursor = (rows[-1][2], rows[-1][0]) if len(rows) == limit else None
+        return [row[1:] for row in rows], cursor
+        
+    def rank(self, score, game_mode='single'):
+        """Place a new score would take among the saved ones, counting from 1"""
+        return self.ranks.rank(score, game_mode)
+        
+    def close(self):
+        """Flush queued scores to disk and close the database"""
+        self.writer.close()
+        self.conn.close()
+
+def ms_to_ticks(ms, tick_rate):
+    """Whole simulation ticks in a duration given in milliseconds"""
+    return ms * tick_rate // 1000
+
+class RandomStreams:
+    """Independent seeded random streams, one per part of the simulation"""
+    NAMES = ('spawning', 'shapes', 'particles', 'ufo')
     
-    conn.close()
-    return scores
+    def __init__(self, seed=None):
+        sequence = np.random.SeedSequence(seed)
+        self.seed = sequence.entropy  # Drawn from the OS when no seed is given
+        for name, child in zip(self.NAMES, sequence.spawn(len(self.NAMES))):
+            setattr(self, name, np.random.default_rng(child))
+
+def interpolate_position(previous, current, alpha):
+    """Blend the last two simulated positions, snapping axes that wrapped around the screen"""
+    dx = current[0] - previous[0]
+    dy = current[1] - previous[1]
+    x = current[0] if abs(dx) > WIDTH / 2 else previous[0] + dx * alpha
+    y = current[1] if abs(dy) > HEIGHT / 2 else previous[1] + dy * alpha
+    return x, y
+
+def circle_bounds(x, y, radius):
+    """Bounding rect of a circle, padded by a pixel for rounding"""
+    return pygame.Rect(int(x - radius) - 1, int(y - radius) - 1, int(2 * radius) + 3, int(2 * radius) + 3)
 
 class TextInput:
     def __init__(self, x, y, width, font, max_length=10):
@@ -236,7 +823,7 @@ class TextInput:
         
         # Draw text
         if self.text:
-            text_surface = self.font.render(self.text, True, self.color)
+            text_surface = render_text(self.font, self.text, self.color)
             game_surface.blit(text_surface, (self.rect.x + 5, self.rect.y + 5))
             
         # Draw cursor
@@ -257,6 +844,8 @@ class Button:
         self.selected_color = selected_color
         self.is_hovered = False
         self.is_selected = False
+        self.label = None  # Text surface, rendered again only when the color changes
+        self.label_color = None
         
     def draw(self):
         # Draw button
@@ -265,9 +854,10 @@ class Button:
         pygame.draw.rect(game_surface, color, self.rect, 2)
         
         # Draw text
-        text_surface = self.font.render(self.text, True, color)
-        text_rect = text_surface.get_rect(center=self.rect.center)
-        game_surface.blit(text_surface, text_rect)
+        if color != self.label_color:
+            self.label = self.font.render(self.text, True, color)
+            self.label_color = color
+        game_surface.blit(self.label, self.label.get_rect(center=self.rect.center))
         
         # Draw selection indicator if selected (triangle)
         if self.is_selected:
@@ -296,83 +886,156 @@ class Button:
                 return True
         return False
 
-class AfterImage:
-    def __init__(self, points, position, rotation, color=PURPLE):
-        self.points = points.copy()  # Copy the ship points
-        self.position = position.copy()  # Position remains fixed
-        self.rotation = rotation
+class SpriteCache:
+    """Bounded least-recently-used cache of the surfaces render(key) builds"""
+    def __init__(self, render, max_entries=512):
+        self.render = render
+        self.max_entries = max_entries
+        self.entries = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        
+    def __len__(self):
+        return len(self.entries)
+        
+    def get(self, key):
+        surface = self.entries.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return surface
+        self.misses += 1
+        surface = self.entries[key] = self.render(key)
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        return surface
+        
+    def clear(self):
+        self.entries.clear()
+        self.hits = self.misses = 0
+
+class EffectsLayer:
+    """Reusable full-screen alpha layer that translucent effects draw into"""
+    def __init__(self, size):
+        self.surface = pygame.Surface(size, pygame.SRCALPHA)
+        self.dirty = None  # Bounding rect of everything drawn since the last composite
+        
+    def polygon(self, color, points):
+        rect = pygame.draw.polygon(self.surface, color, points)
+        self.dirty = rect if self.dirty is None else self.dirty.union(rect)
+        
+    def composite(self, target):
+        """Blend the layer onto target and clear it, returning the area drawn (or None)"""
+        rect = self.dirty
+        if rect is None:
+            return None
+        target.blit(self.surface, rect, rect)
+        self.surface.fill((0, 0, 0, 0), rect)
+        self.dirty = None
+        return rect
+
+class AfterImageTrail:
+    """Fixed ring buffer of fading ship after-images, the oldest at the tail"""
+    def __init__(self, color=PURPLE):
         self.color = color
-        self.lifetime = AFTERIMAGE_DURATION
-        self.max_lifetime = AFTERIMAGE_DURATION
-        
-    def update(self):
-        self.lifetime -= 1
-        return self.lifetime <= 0
-        
-    def draw(self):
-        alpha = int(255 * (self.lifetime / self.max_lifetime))
-        surf = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
-        
-        # Transform ship points to screen coordinates
-        transformed_points = []
-        for point in self.points:
-            transformed_points.append((
-                self.position[0] + point[0],
-                self.position[1] + point[1]
-            ))
+        self.capacity = math.ceil(AFTERIMAGE_DURATION / AFTERIMAGE_FREQUENCY) + 1
+        self.points = [None] * self.capacity  # Ship outline in screen coordinates
+        self.lifetimes = [0] * self.capacity
+        self.tail = 0  # Slot of the oldest image
+        self.count = 0
+        
+    def __len__(self):
+        return self.count
+        
+    def add(self, points, position):
+        if self.count == self.capacity:
+            self.tail = (self.tail + 1) % self.capacity
+            self.count -= 1
+        slot = (self.tail + self.count) % self.capacity
+        self.points[slot] = [(position[0] + x, position[1] + y) for x, y in points]
+        self.lifetimes[slot] = AFTERIMAGE_DURATION
+        self.count += 1
+        
+    def update(self, dt=1.0):
+        for i in range(self.count):
+            self.lifetimes[(self.tail + i) % self.capacity] -= dt
+        while self.count and self.lifetimes[self.tail] <= 0:
+            self.tail = (self.tail + 1) % self.capacity
+            self.count -= 1
             
-        pygame.draw.polygon(surf, (*self.color, alpha), transformed_points)
-        game_surface.blit(surf, (0, 0))
+    def clear(self):
+        self.count = 0
+        
+    def draw(self, layer):
+        """Draw the images oldest first so the newest end up on top"""
+        for i in range(self.count):
+            slot = (self.tail + i) % self.capacity
+            alpha = int(255 * max(0, self.lifetimes[slot] / AFTERIMAGE_DURATION))
+            layer.polygon((*self.color, alpha), self.points[slot])
+
+# Shared layer for translucent effects drawn over the game surface, made by create_app
+effects_layer = None
 
 class PowerUp:
     """Represents a power-up in the game."""
     POWERUP_TYPES = ['invincibility', 'laser_beam', 'nuclear_bomb', 'rapid_fire']
     COLORS = {'invincibility': PURPLE, 'laser_beam': YELLOW, 'nuclear_bomb': GREY, 'rapid_fire': RED}
 
-    def __init__(self, x, y, powerup_type=None):
+    def __init__(self, x, y, powerup_type=None, rng=None):
+        rng = rng if rng is not None else np.random.default_rng()
         self.x = x
         self.y = y
-        self.velocity = [random.uniform(-1, 1), random.uniform(-1, 1)]
+        self.last_position = (x, y)  # Position before the last update, for interpolation
+        self.velocity = [float(rng.uniform(-1, 1)), float(rng.uniform(-1, 1))]
         self.radius = 10
-        self.type = powerup_type if powerup_type else random.choice(self.POWERUP_TYPES)
+        self.type = powerup_type if powerup_type else self.POWERUP_TYPES[rng.integers(len(self.POWERUP_TYPES))]
         self.color = self.COLORS[self.type]
         self.lifetime = 500  # Power-up stays on screen for this many frames
         self.pulse_size = 0
         self.growing = True
 
-    def draw(self):
+    def draw(self, alpha=1.0):
+        x, y = interpolate_position(self.last_position, (self.x, self.y), alpha)
+        
         # Draw main powerup circle
-        pygame.draw.circle(game_surface, self.color, (int(self.x), int(self.y)), self.radius)
+        pygame.draw.circle(game_surface, self.color, (int(x), int(y)), self.radius)
         
         # Draw pulsing outer ring
-        pygame.draw.circle(game_surface, self.color, (int(self.x), int(self.y)), 
+        pygame.draw.circle(game_surface, self.color, (int(x), int(y)), 
                           self.radius + self.pulse_size, 1)
         
         # Draw icon inside based on powerup type
         if self.type == 'invincibility':
             # Shield icon
-            pygame.draw.circle(game_surface, WHITE, (int(self.x), int(self.y)), self.radius-4, 1)
+            pygame.draw.circle(game_surface, WHITE, (int(x), int(y)), self.radius-4, 1)
         elif self.type == 'laser_beam':
             # Beam icon
             pygame.draw.line(game_surface, WHITE, 
-                           (self.x-self.radius+3, self.y), 
-                           (self.x+self.radius-3, self.y), 2)
+                           (x-self.radius+3, y), 
+                           (x+self.radius-3, y), 2)
         elif self.type == 'nuclear_bomb':
             # Bomb icon
-            pygame.draw.circle(game_surface, WHITE, (int(self.x), int(self.y)), self.radius-4)
+            pygame.draw.circle(game_surface, WHITE, (int(x), int(y)), self.radius-4)
             pygame.draw.line(game_surface, self.color, 
-                           (self.x, self.y-self.radius+3), 
-                           (self.x, self.y-3), 2)
+                           (x, y-self.radius+3), 
+                           (x, y-3), 2)
         elif self.type == 'rapid_fire':
             # Bullet icon
             for i in range(3):
                 pygame.draw.circle(game_surface, WHITE, 
-                                 (int(self.x-4+i*4), int(self.y)), 2)
+                                 (int(x-4+i*4), int(y)), 2)
 
-    def update(self):
+    def bounds(self, alpha=1.0):
+        """Screen area draw() covers"""
+        x, y = interpolate_position(self.last_position, (self.x, self.y), alpha)
+        return circle_bounds(x, y, self.radius + 5)
+        
+    def update(self, dt=1.0):
+        self.last_position = (self.x, self.y)
+        
         # Update position
-        self.x += self.velocity[0]
-        self.y += self.velocity[1]
+        self.x += self.velocity[0] * dt
+        self.y += self.velocity[1] * dt
         
         # Wrap around screen edges
         if self.x < 0:
@@ -387,58 +1050,144 @@ class PowerUp:
             
         # Update pulse effect
         if self.growing:
-            self.pulse_size += 0.2
+            self.pulse_size += 0.2 * dt
             if self.pulse_size > 4:
                 self.growing = False
         else:
-            self.pulse_size -= 0.2
+            self.pulse_size -= 0.2 * dt
             if self.pulse_size < 0:
                 self.growing = True
         
         # Update lifetime
-        self.lifetime -= 1
+        self.lifetime -= dt
         return self.lifetime <= 0  # Return True if the power-up expires
 
     def check_collision(self, player):
         distance = math.sqrt((self.x - player.position[0])**2 + (self.y - player.position[1])**2)
         return distance < self.radius + player.radius
 
+class EntityList:
+    """Ordered entities that kill() flags and compact() removes, once per tick"""
+    def __init__(self, on_remove=None):
+        self.items = []
+        self.dead = set()
+        self.on_remove = on_remove
+        
+    def __iter__(self):
+        if not self.dead:
+            return iter(self.items)
+        return (item for item in self.items if item not in self.dead)
+        
+    def __len__(self):
+        return len(self.items) - len(self.dead)
+        
+    def append(self, item):
+        self.items.append(item)
+        
+    def kill(self, item):
+        self.dead.add(item)
+        
+    def alive(self, item):
+        return item not in self.dead
+        
+    def clear(self):
+        self.dead.update(self.items)
+        
+    def compact(self):
+        """Drop killed entities in a single pass"""
+        if not self.dead:
+            return
+        self.items = [item for item in self.items if item not in self.dead]
+        if self.on_remove:
+            for item in self.dead:
+                self.on_remove(item)
+        self.dead.clear()
+
+class ObjectPool:
+    """Free list of reusable instances of one class, re-initialized through reset()"""
+    def __init__(self, cls):
+        self.cls = cls
+        self.free = []
+        self.created = 0   # Instances built from scratch
+        self.reused = 0    # Acquisitions served from the free list
+        self.released = 0
+        
+    def acquire(self, *args, **kwargs):
+        if self.free:
+            obj = self.free.pop()
+            obj.reset(*args, **kwargs)
+            self.reused += 1
+        else:
+            obj = self.cls(*args, **kwargs)
+            self.created += 1
+        return obj
+        
+    def release(self, obj):
+        self.free.append(obj)
+        self.released += 1
+        
+    def stats(self):
+        """Allocation statistics as a dict"""
+        return {
+            'created': self.created,
+            'reused': self.reused,
+            'released': self.released,
+            'in_use': self.created + self.reused - self.released,
+            'free': len(self.free),
+        }
+
 class Bullet:
+    __slots__ = ('position', 'velocity', 'radius', 'lifetime', 'is_nuke', 'color',
+                 'prev_position', 'player_id', 'sound_channel', 'source')
+    
     def __init__(self, x, y, vx, vy, is_nuke=False, player_id=0, source="player"):
-        self.position = [x, y]
-        self.velocity = [vx, vy]
+        self.position = [0, 0]
+        self.velocity = [0, 0]
+        self.prev_position = [0, 0]
         self.radius = 2
+        self.reset(x, y, vx, vy, is_nuke, player_id, source)
+        
+    def reset(self, x, y, vx, vy, is_nuke=False, player_id=0, source="player"):
+        """Re-initialize a pooled bullet in place"""
+        self.position[:] = x, y
+        self.velocity[:] = vx, vy
         self.lifetime = 90  # Adjusted for larger play area
         self.is_nuke = is_nuke
         self.color = GREY if is_nuke else (WHITE if player_id == 0 else CYAN)
-        self.prev_position = [x - vx, y - vy]  # Store previous position for continuous collision detection
+        self.prev_position[:] = x - vx, y - vy  # Store previous position for continuous collision detection
         self.player_id = player_id  # Track which player fired the bullet
         self.sound_channel = None
         self.source = source  # "player" or "ufo"
 
         # Start playing the continuous sound if it's a nuke
         if self.is_nuke:
-            self.sound_channel = sounds['nuke_fire'].play(-1)  # -1 means loop indefinitely
+            self.sound_channel = play_sound('nuke_fire', -1)  # -1 means loop indefinitely
         
-    def draw(self):
+    def draw(self, alpha=1.0):
+        x, y = interpolate_position(self.prev_position, self.position, alpha)
         if self.is_nuke:
             # Draw larger nuke bullet
-            pygame.draw.circle(game_surface, self.color, (int(self.position[0]), int(self.position[1])), self.radius * 2)
+            pygame.draw.circle(game_surface, self.color, (int(x), int(y)), self.radius * 2)
             # Pulsing effect
             pulse = int(pygame.time.get_ticks() / 100) % 3
-            pygame.draw.circle(game_surface, RED, (int(self.position[0]), int(self.position[1])), 
+            pygame.draw.circle(game_surface, RED, (int(x), int(y)), 
                               self.radius * 2 + pulse, 1)
         else:
-            pygame.draw.circle(game_surface, self.color, (int(self.position[0]), int(self.position[1])), self.radius)
+            pygame.draw.circle(game_surface, self.color, (int(x), int(y)), self.radius)
         
-    def update(self):
+    def bounds(self, alpha=1.0):
+        """Screen area draw() covers, nuke pulse included"""
+        x, y = interpolate_position(self.prev_position, self.position, alpha)
+        return circle_bounds(x, y, self.radius * 2 + 3)
+        
+    def update(self, dt=1.0):
         # Store previous position for collision detection
         self.prev_position[0] = self.position[0]
         self.prev_position[1] = self.position[1]
         
         # Update position
-        self.position[0] += self.velocity[0]
-        self.position[1] += self.velocity[1]
+        self.position[0] += self.velocity[0] * dt
+        self.position[1] += self.velocity[1] * dt
         
         # Wrap around screen edges
         if self.position[0] < 0:
@@ -456,73 +1205,87 @@ class Bullet:
             self.prev_position[1] = 1  # Adjust prev_position for wrapped bullets
             
         # Decrease lifetime
-        self.lifetime -= 1
+        self.lifetime -= dt
         
     def is_dead(self):
         return self.lifetime <= 0
-        
-    def check_collision(self, asteroid):
-        distance = math.sqrt((self.position[0] - asteroid.position[0])**2 + 
-                            (self.position[1] - asteroid.position[1])**2)
-        return distance < self.radius + asteroid.radius
 
-    def line_collision(self, asteroid):
-        # Calculate vector from previous to current position
-        dx = self.position[0] - self.prev_position[0]
-        dy = self.position[1] - self.prev_position[1]
-        
-        # Calculate coefficients for line-circle intersection
-        a = dx*dx + dy*dy
-        
-        # If bullet didn't move, use standard collision check
-        if a < 0.0001:
-            return self.check_collision(asteroid)
-        
-        b = 2 * (dx * (self.prev_position[0] - asteroid.position[0]) + 
-                 dy * (self.prev_position[1] - asteroid.position[1]))
-        c = (self.prev_position[0] - asteroid.position[0])**2 + \
-            (self.prev_position[1] - asteroid.position[1])**2 - \
-            (asteroid.radius + self.radius)**2
-        
-        discriminant = b*b - 4*a*c
-        
-        if discriminant < 0:
-            return False  # No intersection
-        
-        # Find the values of t where the line intersects the circle
-        t1 = (-b + math.sqrt(discriminant)) / (2*a)
-        t2 = (-b - math.sqrt(discriminant)) / (2*a)
-        
-        # Check if intersection is within the current frame's movement
-        return (0 <= t1 <= 1) or (0 <= t2 <= 1)
+# Bullets are recycled rather than garbage collected, they churn fastest of all entities
+bullet_pool = ObjectPool(Bullet)
+
+def swept_hits(start, end, bullet_radii, centers, radii, bullets=None, targets=None):
+    """(bullet indices, circle indices) of one tick's swept hits, in order of contact"""
+    # Bullets travel from start to end (B x 2) and meet circles at centers (C x 2); bullets/targets
+    # restrict the pairs tested, e.g. to a Broadphase's candidates
+    start = np.asarray(start, dtype=float).reshape(-1, 2)
+    end = np.asarray(end, dtype=float).reshape(-1, 2)
+    if bullets is None:
+        bullets, targets = (grid.ravel() for grid in np.indices((len(start), len(centers))))
+    if len(bullets) == 0:
+        return np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.intp)
+        
+    # Solve |start + t * travel - center| = reach for t, the time of contact along the swept path
+    origin = start[bullets]
+    travel = end[bullets] - origin
+    offset = origin - centers[targets]
+    reach = np.asarray(bullet_radii, dtype=float)[bullets] + radii[targets]
+    a = (travel * travel).sum(axis=1)
+    b = 2 * (travel * offset).sum(axis=1)
+    c = (offset * offset).sum(axis=1) - reach * reach
+    discriminant = b * b - 4 * a * c
+    
+    # Bullets that barely moved fall back to a plain overlap test
+    moving = a >= 0.0001
+    root = np.sqrt(np.maximum(discriminant, 0))
+    denominator = np.where(moving, 2 * a, 1)
+    t_enter = (-b - root) / denominator
+    t_exit = (-b + root) / denominator
+    hit = np.where(moving, (discriminant >= 0) & (t_enter <= 1) & (t_exit >= 0), c < 0)
+    
+    candidates = np.flatnonzero(hit)
+    t = np.where(moving, np.maximum(t_enter, 0), 0)[candidates]
+    order = candidates[np.lexsort((targets[candidates], bullets[candidates], t))]
+    
+    # Earliest contacts first; a bullet or circle already used is out of play
+    used_bullets, used_targets = set(), set()
+    hit_bullets, hit_targets = [], []
+    for bullet, target in zip(bullets[order].tolist(), targets[order].tolist()):
+        if bullet not in used_bullets and target not in used_targets:
+            used_bullets.add(bullet)
+            used_targets.add(target)
+            hit_bullets.append(bullet)
+            hit_targets.append(target)
+    return np.array(hit_bullets, dtype=np.intp), np.array(hit_targets, dtype=np.intp)
+
+def render_laser_glow(key):
+    """One GLOW_TILE-long tile of both glow layers for a (color, rotation) key"""
+    color, rotation = key
+    tile = pygame.Surface((LaserBeam.GLOW_TILE, LaserBeam.width + 6), pygame.SRCALPHA)
+    for i in range(1, 3):
+        layer = pygame.Surface(tile.get_size(), pygame.SRCALPHA)
+        middle = tile.get_height() // 2
+        pygame.draw.line(layer, (*color, 150 - i * 50), (0, middle), (LaserBeam.GLOW_TILE, middle),
+                         LaserBeam.width + i * 2)
+        tile.blit(layer, (0, 0))
+    return pygame.transform.rotate(tile, -rotation)
 
 class LaserBeam:
+    width = 10
+    GLOW_TILE = 64  # Length of beam covered by one cached glow sprite
+    GLOW_ROTATION_STEP = 2  # Degrees between cached glow orientations
+    glow_sprites = SpriteCache(render_laser_glow)
+    
     def __init__(self, player):
         self.player = player
         self.duration = 180  # 3 seconds at 60 FPS
-        self.width = 10
         self.length = 3000  # Long enough to reach across the screen
         self.color = YELLOW if player.player_id == 0 else CYAN
-        
-        # Calculate and store beam line segment for collision detection
-        angle = math.radians(player.rotation)
-        self.start_x = player.position[0]
-        self.start_y = player.position[1]
-        self.dx = math.cos(angle)
-        self.dy = math.sin(angle)
-        self.end_x = self.start_x + self.length * self.dx
-        self.end_y = self.start_y + self.length * self.dy
         self.player_id = player.player_id  # Track which player fired the laser
+        self.aim()
         
-    def draw(self):
+    def aim(self):
+        """Calculate and store beam line segment for collision detection"""
         angle = math.radians(self.player.rotation)
-        start_x = self.player.position[0] + self.player.radius * math.cos(angle)
-        start_y = self.player.position[1] + self.player.radius * math.sin(angle)
-        
-        end_x = start_x + self.length * math.cos(angle)
-        end_y = start_y + self.length * math.sin(angle)
-        
-        # Update beam position (these are used for collision detection)
         self.start_x = self.player.position[0]
         self.start_y = self.player.position[1]
         self.dx = math.cos(angle)
@@ -530,29 +1293,60 @@ class LaserBeam:
         self.end_x = self.start_x + self.length * self.dx
         self.end_y = self.start_y + self.length * self.dy
         
+    def draw(self, alpha=1.0):
+        player_x, player_y = self.player.render_position(alpha)
+        dx, dy = self.dx, self.dy
+        start_x = player_x + self.player.radius * dx
+        start_y = player_y + self.player.radius * dy
+        
+        end_x = start_x + self.length * dx
+        end_y = start_y + self.length * dy
+        
         # Draw the main laser beam
         pygame.draw.line(game_surface, self.color, (start_x, start_y), (end_x, end_y), self.width)
         
-        # Draw glow effect
-        for i in range(1, 3):
-            alpha = 150 - i * 50
-            glow_surf = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
-            pygame.draw.line(glow_surf, (self.color[0], self.color[1], self.color[2], alpha), 
-                          (start_x, start_y), (end_x, end_y), self.width + i * 2)
-            game_surface.blit(glow_surf, (0, 0))
+        # Draw glow effect from cached tiles, only as far as the beam stays on screen
+        visible = self.screen_margin().clipline((start_x, start_y), (end_x, end_y))
+        if visible:
+            (x1, y1), (x2, y2) = visible
+            far = math.hypot(x2 - start_x, y2 - start_y)
+            rotation = round(self.player.rotation / self.GLOW_ROTATION_STEP) * self.GLOW_ROTATION_STEP % 360
+            glow = self.glow_sprites.get((self.color, rotation))
+            half_w, half_h = glow.get_width() / 2, glow.get_height() / 2
+            game_surface.blits([(glow, (start_x + d * dx - half_w, start_y + d * dy - half_h))
+                                for d in range(self.GLOW_TILE // 2, int(far) + self.GLOW_TILE, self.GLOW_TILE)],
+                               doreturn=False)
             
         # Draw pulse effect along the beam
         time = pygame.time.get_ticks()
-        pulse_positions = [(start_x + i * 30 * math.cos(angle), 
-                          start_y + i * 30 * math.sin(angle)) 
+        pulse_positions = [(start_x + i * 30 * dx, 
+                          start_y + i * 30 * dy) 
                          for i in range(10)]
         
         for i, pos in enumerate(pulse_positions):
             if (i + time // 100) % 3 == 0:  # Makes the pulses move along the beam
                 pygame.draw.circle(game_surface, WHITE, (int(pos[0]), int(pos[1])), 3)
         
-    def update(self):
-        self.duration -= 1
+    def screen_margin(self):
+        """The screen plus a border wide enough that a beam just outside it can still show"""
+        return game_surface.get_rect().inflate(self.GLOW_TILE, self.GLOW_TILE)
+        
+    def bounds(self, alpha=1.0):
+        """Screen area draw() covers: the on-screen part of the beam plus its glow"""
+        player_x, player_y = self.player.render_position(alpha)
+        start = (player_x + self.player.radius * self.dx, player_y + self.player.radius * self.dy)
+        end = (start[0] + self.length * self.dx, start[1] + self.length * self.dy)
+        visible = self.screen_margin().clipline(start, end)
+        if not visible:
+            return circle_bounds(start[0], start[1], self.width)
+        (x1, y1), (x2, y2) = visible
+        rect = pygame.Rect(min(x1, x2, start[0]), min(y1, y2, start[1]), 0, 0)
+        rect.union_ip(pygame.Rect(max(x1, x2, start[0]), max(y1, y2, start[1]), 1, 1))
+        return rect.inflate(self.GLOW_TILE, self.GLOW_TILE)
+        
+    def update(self, dt=1.0):
+        self.aim()  # Follow the ship
+        self.duration -= dt
         return self.duration <= 0  # Return True when laser is finished
     
     def point_to_line_distance(self, point_x, point_y, line_x1, line_y1, line_x2, line_y2):
@@ -576,53 +1370,44 @@ class LaserBeam:
         return math.sqrt((point_x - proj_x)**2 + (point_y - proj_y)**2)
         
     def check_collision(self, obj):
-        # Get adjustment factor for small asteroids (wider collision area)
-        width_factor = 2.0 if isinstance(obj, Asteroid) and obj.size == 1 else 1.0
-        effective_width = self.width * width_factor
-        
-        # Check direct collision
-        if self.point_to_line_distance(obj.position[0], obj.position[1], 
-                                      self.start_x, self.start_y, 
-                                      self.end_x, self.end_y) <= (obj.radius + effective_width):
-            return True
-            
-        # For small asteroids, we need to handle screen wrapping
-        if isinstance(obj, Asteroid) and obj.size == 1:
-            # Create "phantom" positions for screen wrapping cases
-            wrap_positions = []
-            
-            # Check if near screen edges
-            if obj.position[0] < obj.radius * 2:
-                wrap_positions.append((obj.position[0] + WIDTH, obj.position[1]))
-            elif obj.position[0] > WIDTH - obj.radius * 2:
-                wrap_positions.append((obj.position[0] - WIDTH, obj.position[1]))
-                
-            if obj.position[1] < obj.radius * 2:
-                wrap_positions.append((obj.position[0], obj.position[1] + HEIGHT))
-            elif obj.position[1] > HEIGHT - obj.radius * 2:
-                wrap_positions.append((obj.position[0], obj.position[1] - HEIGHT))
-                
-            # Add diagonal wrapping cases
-            if obj.position[0] < obj.radius * 2 and obj.position[1] < obj.radius * 2:
-                wrap_positions.append((obj.position[0] + WIDTH, obj.position[1] + HEIGHT))
-            elif obj.position[0] < obj.radius * 2 and obj.position[1] > HEIGHT - obj.radius * 2:
-                wrap_positions.append((obj.position[0] + WIDTH, obj.position[1] - HEIGHT))
-            elif obj.position[0] > WIDTH - obj.radius * 2 and obj.position[1] < obj.radius * 2:
-                wrap_positions.append((obj.position[0] - WIDTH, obj.position[1] + HEIGHT))
-            elif obj.position[0] > WIDTH - obj.radius * 2 and obj.position[1] > HEIGHT - obj.radius * 2:
-                wrap_positions.append((obj.position[0] - WIDTH, obj.position[1] - HEIGHT))
-                
-            # Check all wrap positions
-            for pos_x, pos_y in wrap_positions:
-                if self.point_to_line_distance(pos_x, pos_y, 
-                                             self.start_x, self.start_y, 
-                                             self.end_x, self.end_y) <= (obj.radius + effective_width):
-                    return True
-                    
-        return False
+        return self.point_to_line_distance(obj.position[0], obj.position[1],
+                                           self.start_x, self.start_y,
+                                           self.end_x, self.end_y) <= obj.radius + self.width
+
+    def check_field(self, field):
+        """Boolean mask of the rocks in an AsteroidField touched by the beam"""
+        n = field.count
+        x, y = field.position[:n, 0], field.position[:n, 1]
+        radius = field.radius[:n]
+        small = field.size[:n] == 1
+        
+        # Small asteroids get a wider collision area
+        reach = radius + self.width * np.where(small, 2.0, 1.0)
+        hit = self.segment_distances(x, y) <= reach
+        
+        # Phantom positions for small asteroids close to a screen edge
+        shift_x = np.where(x < radius * 2, WIDTH, np.where(x > WIDTH - radius * 2, -WIDTH, 0))
+        shift_y = np.where(y < radius * 2, HEIGHT, np.where(y > HEIGHT - radius * 2, -HEIGHT, 0))
+        shift_x = np.where(small, shift_x, 0)
+        shift_y = np.where(small, shift_y, 0)
+        for dx, dy, applies in ((shift_x, 0, shift_x != 0),
+                                (0, shift_y, shift_y != 0),
+                                (shift_x, shift_y, (shift_x != 0) & (shift_y != 0))):
+            hit |= applies & (self.segment_distances(x + dx, y + dy) <= reach)
+        return hit
+        
+    def segment_distances(self, px, py):
+        """Shortest distances from arrays of points to the beam segment"""
+        seg_x = self.end_x - self.start_x
+        seg_y = self.end_y - self.start_y
+        length_sq = seg_x**2 + seg_y**2
+        if length_sq == 0:
+            return np.hypot(px - self.start_x, py - self.start_y)
+        t = np.clip(((px - self.start_x) * seg_x + (py - self.start_y) * seg_y) / length_sq, 0, 1)
+        return np.hypot(px - (self.start_x + t * seg_x), py - (self.start_y + t * seg_y))
 
 class Player:
-    def __init__(self, player_id=0):
+    def __init__(self, player_id=0, tick_rate=BASE_TICK_RATE):
         self.position = [WIDTH // 2, HEIGHT // 2]
         self.velocity = [0, 0]
         self.acceleration = 0.2
@@ -641,21 +1426,23 @@ class Player:
             self.position = [WIDTH // 3, HEIGHT // 2]
         else:
             self.position = [2 * WIDTH // 3, HEIGHT // 2]
+        self.last_position = self.position.copy()  # Position before the last update, for interpolation
         
-        # Respawn invulnerability
+        # Respawn invulnerability (timers hold the simulation tick they started on)
         self.invulnerable = False
         self.invulnerable_timer = 0
-        self.respawn_invulnerable_duration = 2000  # 2 seconds
+        self.respawn_invulnerable_duration = ms_to_ticks(2000, tick_rate)  # 2 seconds
         
         # Power-up state
         self.active_powerup = None
         self.is_invincible = False  # Separate flag for invincibility
         self.powerup_timer = 0
         self.invincible_timer = 0
+        self.invincible_duration = ms_to_ticks(10000, tick_rate)  # 10 seconds
         self.rapid_fire_ammo = 0
         
         # After-images for invincibility
-        self.after_images = []
+        self.after_images = AfterImageTrail()
         self.afterimage_counter = 0
         
         # Flags for one-time-use powerups
@@ -679,7 +1466,15 @@ class Player:
         
         return points
         
-    def draw(self):
+    def render_position(self, alpha=1.0):
+        return interpolate_position(self.last_position, self.position, alpha)
+        
+    def bounds(self, alpha=1.0):
+        """Screen area draw() covers, thrust flame included"""
+        x, y = self.render_position(alpha)
+        return circle_bounds(x, y, self.radius * 1.5 + 1)
+        
+    def draw(self, alpha=1.0):
         # Don't draw if respawn invulnerable and should be "blinking"
         if self.invulnerable and not self.is_invincible and pygame.time.get_ticks() % 200 < 100:
             return
@@ -703,23 +1498,20 @@ class Player:
         else:
             color = base_color
         
-        # Draw all after-images
-        for after_image in self.after_images:
-            after_image.draw()
-            
         # Create the points of the triangle representing the ship
+        x, y = self.render_position(alpha)
         angle = math.radians(self.rotation)
         cos_val = math.cos(angle)
         sin_val = math.sin(angle)
         
         # Ship points (front, back right, back left)
         ship_points = [
-            (self.position[0] + self.radius * cos_val, 
-             self.position[1] + self.radius * sin_val),
-            (self.position[0] - self.radius * cos_val + self.radius/2 * math.cos(angle + math.pi/2), 
-             self.position[1] - self.radius * sin_val + self.radius/2 * math.sin(angle + math.pi/2)),
-            (self.position[0] - self.radius * cos_val + self.radius/2 * math.cos(angle - math.pi/2), 
-             self.position[1] - self.radius * sin_val + self.radius/2 * math.sin(angle - math.pi/2))
+            (x + self.radius * cos_val, 
+             y + self.radius * sin_val),
+            (x - self.radius * cos_val + self.radius/2 * math.cos(angle + math.pi/2), 
+             y - self.radius * sin_val + self.radius/2 * math.sin(angle + math.pi/2)),
+            (x - self.radius * cos_val + self.radius/2 * math.cos(angle - math.pi/2), 
+             y - self.radius * sin_val + self.radius/2 * math.sin(angle - math.pi/2))
         ]
         
         # Draw the ship
@@ -729,26 +1521,26 @@ class Player:
         if self.is_thrusting:
             flame_color = BLUE if self.player_id == 0 else GREEN
             flame_points = [
-                (self.position[0] - self.radius * 1.5 * cos_val, 
-                 self.position[1] - self.radius * 1.5 * sin_val),
-                (self.position[0] - self.radius * cos_val + self.radius/2 * math.cos(angle + math.pi/2), 
-                 self.position[1] - self.radius * sin_val + self.radius/2 * math.sin(angle + math.pi/2)),
-                (self.position[0] - self.radius * cos_val + self.radius/2 * math.cos(angle - math.pi/2), 
-                 self.position[1] - self.radius * sin_val + self.radius/2 * math.sin(angle - math.pi/2))
+                (x - self.radius * 1.5 * cos_val, 
+                 y - self.radius * 1.5 * sin_val),
+                (x - self.radius * cos_val + self.radius/2 * math.cos(angle + math.pi/2), 
+                 y - self.radius * sin_val + self.radius/2 * math.sin(angle + math.pi/2)),
+                (x - self.radius * cos_val + self.radius/2 * math.cos(angle - math.pi/2), 
+                 y - self.radius * sin_val + self.radius/2 * math.sin(angle - math.pi/2))
             ]
             pygame.draw.polygon(game_surface, flame_color, flame_points)
         
-    def rotate(self, direction):
-        self.rotation += direction * self.rotation_speed
+    def rotate(self, direction, dt=1.0):
+        self.rotation += direction * self.rotation_speed * dt
         # Keep rotation between 0 and 360
         self.rotation %= 360
         
-    def thrust(self):
+    def thrust(self, dt=1.0):
         self.is_thrusting = True
         # Calculate acceleration components based on ship's orientation
         angle = math.radians(self.rotation)
-        self.velocity[0] += self.acceleration * math.cos(angle)
-        self.velocity[1] += self.acceleration * math.sin(angle)
+        self.velocity[0] += self.acceleration * math.cos(angle) * dt
+        self.velocity[1] += self.acceleration * math.sin(angle) * dt
         
         # Limit speed
         speed = math.sqrt(self.velocity[0]**2 + self.velocity[1]**2)
@@ -756,14 +1548,18 @@ class Player:
             self.velocity[0] = (self.velocity[0] / speed) * self.max_speed
             self.velocity[1] = (self.velocity[1] / speed) * self.max_speed
     
-    def update(self):
+    def update(self, tick, dt=1.0):
+        self.last_position[0] = self.position[0]
+        self.last_position[1] = self.position[1]
+        
         # Apply friction to slow down gradually when not thrusting
-        self.velocity[0] *= self.friction
-        self.velocity[1] *= self.friction
+        friction = self.friction ** dt
+        self.velocity[0] *= friction
+        self.velocity[1] *= friction
         
         # Update position based on velocity
-        self.position[0] += self.velocity[0]
-        self.position[1] += self.velocity[1]
+        self.position[0] += self.velocity[0] * dt
+        self.position[1] += self.velocity[1] * dt
         
         # Wrap around the screen edges
         if self.position[0] < 0:
@@ -778,27 +1574,22 @@ class Player:
         
         # Update after-image counter for invincibility effect
         if self.is_invincible:
-            self.afterimage_counter += 1
+            self.afterimage_counter += dt
             if self.afterimage_counter >= AFTERIMAGE_FREQUENCY:
                 # Create a new after-image at the current position
-                ship_points = self.get_ship_points()
-                self.after_images.append(AfterImage(ship_points, self.position, self.rotation))
+                self.after_images.add(self.get_ship_points(), self.position)
                 self.afterimage_counter = 0
                 
         # Update after-images
-        for after_image in self.after_images[:]:
-            if after_image.update():
-                self.after_images.remove(after_image)
+        self.after_images.update(dt)
         
         # Update respawn invulnerability timer
         if self.invulnerable and not self.is_invincible:
-            current_time = pygame.time.get_ticks()
-            if current_time - self.invulnerable_timer > self.respawn_invulnerable_duration:
+            if tick - self.invulnerable_timer > self.respawn_invulnerable_duration:
                 self.invulnerable = False
                 
         # Update invincibility power-up timer
-        current_time = pygame.time.get_ticks()
-        if self.is_invincible and current_time - self.invincible_timer > 10000:
+        if self.is_invincible and tick - self.invincible_timer > self.invincible_duration:
             self.is_invincible = False
                 
         # Reset thrust status (for rendering flame)
@@ -813,7 +1604,7 @@ class Player:
             bullet_vx = 5 * math.cos(angle) + self.velocity[0] * 0.5  # Slower than regular bullets
             bullet_vy = 5 * math.sin(angle) + self.velocity[1] * 0.5
             self.has_nuke = False  # Use up the nuke
-            return Bullet(bullet_x, bullet_y, bullet_vx, bullet_vy, is_nuke=True, player_id=self.player_id)
+            return bullet_pool.acquire(bullet_x, bullet_y, bullet_vx, bullet_vy, is_nuke=True, player_id=self.player_id)
             
         elif self.has_laser:
             # Activate laser beam
@@ -833,7 +1624,7 @@ class Player:
             if self.rapid_fire_ammo <= 0:
                 self.active_powerup = None
                 
-            return Bullet(bullet_x, bullet_y, bullet_vx, bullet_vy, player_id=self.player_id)
+            return bullet_pool.acquire(bullet_x, bullet_y, bullet_vx, bullet_vy, player_id=self.player_id)
         else:
             # Regular shot
             angle = math.radians(self.rotation)
@@ -841,7 +1632,7 @@ class Player:
             bullet_y = self.position[1] + self.radius * math.sin(angle)
             bullet_vx = 10 * math.cos(angle) + self.velocity[0] * 0.5
             bullet_vy = 10 * math.sin(angle) + self.velocity[1] * 0.5
-            return Bullet(bullet_x, bullet_y, bullet_vx, bullet_vy, player_id=self.player_id)
+            return bullet_pool.acquire(bullet_x, bullet_y, bullet_vx, bullet_vy, player_id=self.player_id)
         
     def check_collision(self, asteroid):
         # Skip collision check if invulnerable
@@ -853,27 +1644,27 @@ class Player:
                             (self.position[1] - asteroid.position[1])**2)
         return distance < self.radius + asteroid.radius
         
-    def respawn(self):
+    def respawn(self, tick):
         # Different respawn positions for coop mode
         if self.player_id == 0:
             self.position = [WIDTH // 3, HEIGHT // 2]
         else:
             self.position = [2 * WIDTH // 3, HEIGHT // 2]
+        self.last_position = self.position.copy()
             
         self.velocity = [0, 0]
         self.rotation = 0
         self.invulnerable = True
-        self.invulnerable_timer = pygame.time.get_ticks()
+        self.invulnerable_timer = tick
         
-    def collect_powerup(self, powerup_type):
+    def collect_powerup(self, powerup_type, tick):
         play_sound('powerup')
-        current_time = pygame.time.get_ticks()
         
         if powerup_type == 'invincibility':
             # Invincibility can coexist with other powerups
             self.is_invincible = True
-            self.invincible_timer = current_time
-            self.after_images = []  # Clear previous after-images
+            self.invincible_timer = tick
+            self.after_images.clear()  # Clear previous after-images
             
         else:
             # Reset any active powerup that's not invincibility
@@ -896,131 +1687,221 @@ class Player:
                 self.active_powerup = 'rapid_fire'
                 self.rapid_fire_ammo = 200
 
-class Asteroid:
-    def __init__(self, x=None, y=None, size=3):
-        # Size: 3 = large, 2 = medium, 1 = small
-        self.size = size
-        
-        if size == 3:
-            self.radius = 40
-        elif size == 2:
-            self.radius = 20
-        else:
-            self.radius = 10
+# Lightweight read-only view of one rock in an AsteroidField, for code that
+# reads a single rock's position, radius and size
+AsteroidView = collections.namedtuple('AsteroidView', 'index position radius size')
+
+class AsteroidField:
+    """All asteroids of a scene stored as parallel NumPy arrays and updated in bulk"""
+    RADII = {3: 40, 2: 20, 1: 10}
+    SHAPES_PER_SIZE = 16
+    
+    def __init__(self, capacity=64, rng=None, shape_rng=None):
+        self.rng = rng if rng is not None else np.random.default_rng()  # Positions and velocities
+        self.shape_rng = shape_rng if shape_rng is not None else self.rng  # Outlines and which rock gets which
+        self.count = 0
+        self.position = np.zeros((capacity, 2))
+        self.last_position = np.zeros((capacity, 2))  # Position before the last update, for interpolation
+        self.velocity = np.zeros((capacity, 2))
+        self.radius = np.zeros(capacity)
+        self.size = np.zeros(capacity, dtype=np.int8)
+        self.shape = np.zeros(capacity, dtype=np.int32)
+        
+        # Jagged outlines, SHAPES_PER_SIZE for each size; shape ids index this list
+        self.shapes = []
+        for size in (1, 2, 3):
+            for _ in range(self.SHAPES_PER_SIZE):
+                self.shapes.append(self.make_shape(self.RADII[size]))
+                
+    def make_shape(self, radius):
+        """Create a jagged outline around the origin"""
+        num_vertices = int(self.shape_rng.integers(8, 13))
+        angles = 2 * np.pi * np.arange(num_vertices) / num_vertices
+        # Random radius variation for jagged look
+        radii = radius * self.shape_rng.uniform(0.8, 1.2, num_vertices)
+        return np.column_stack((radii * np.cos(angles), radii * np.sin(angles)))
+        
+    def __len__(self):
+        return self.count
+        
+    def reserve(self, count):
+        """Grow the arrays (doubling) so they can hold count rocks"""
+        capacity = len(self.radius)
+        if count <= capacity:
+            return
+        while capacity < count:
+            capacity *= 2
+        for name in ('position', 'last_position', 'velocity', 'radius', 'size', 'shape'):
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:self.count] = old[:self.count]
+            setattr(self, name, new)
             
-        # Initialize position - if not provided, place at random edge location
-        if x is None or y is None:
-            # Pick a random edge
-            edge = random.randint(0, 3)
-            if edge == 0:  # Top
-                self.position = [random.randint(0, WIDTH), 0]
-            elif edge == 1:  # Right
-                self.position = [WIDTH, random.randint(0, HEIGHT)]
-            elif edge == 2:  # Bottom
-                self.position = [random.randint(0, WIDTH), HEIGHT]
-            else:  # Left
-                self.position = [0, random.randint(0, HEIGHT)]
-        else:
-            self.position = [x, y]
-        
-        # Random velocity based on size (smaller asteroids move faster)
-        speed_factor = 4 - size  # 1 for large, 2 for medium, 3 for small
-        angle = random.uniform(0, 2 * math.pi)
-        self.velocity = [
-            random.uniform(0.5, 2) * speed_factor * math.cos(angle),
-            random.uniform(0.5, 2) * speed_factor * math.sin(angle)
-        ]
-        
-        # Create a jagged shape for the asteroid
-        self.vertices = []
-        num_vertices = random.randint(8, 12)
-        for i in range(num_vertices):
-            angle = 2 * math.pi * i / num_vertices
-            # Random radius variation for jagged look
-            rand_radius = self.radius * random.uniform(0.8, 1.2)
-            x = rand_radius * math.cos(angle)
-            y = rand_radius * math.sin(angle)
-            self.vertices.append((x, y))
+    def add(self, x, y, sizes):
+        """Append a batch of rocks at the given positions with random velocities and shapes"""
+        sizes = np.broadcast_to(np.asarray(sizes, dtype=np.int8), np.shape(x))
+        n = len(sizes)
+        if n == 0:
+            return
+        start, end = self.count, self.count + n
+        self.reserve(end)
         
-    def draw(self):
-        # Transform relative vertices to screen coordinates
-        transformed_vertices = []
-        for vertex in self.vertices:
-            transformed_vertices.append((
-                self.position[0] + vertex[0],
-                self.position[1] + vertex[1]
-            ))
-        pygame.draw.polygon(game_surface, WHITE, transformed_vertices, 1)
+        self.position[start:end, 0] = x
+        self.position[start:end, 1] = y
+        self.last_position[start:end] = self.position[start:end]
+        self.size[start:end] = sizes
+        self.radius[start:end] = np.where(sizes == 3, 40, np.where(sizes == 2, 20, 10))
         
-    def update(self):
-        # Update position
-        self.position[0] += self.velocity[0]
-        self.position[1] += self.velocity[1]
+        # Random velocity based on size (smaller asteroids move faster)
+        speed_factor = 4 - sizes
+        angle = self.rng.uniform(0, 2 * np.pi, n)
+        self.velocity[start:end, 0] = self.rng.uniform(0.5, 2, n) * speed_factor * np.cos(angle)
+        self.velocity[start:end, 1] = self.rng.uniform(0.5, 2, n) * speed_factor * np.sin(angle)
+        
+        self.shape[start:end] = (sizes - 1) * self.SHAPES_PER_SIZE + \
+            self.shape_rng.integers(0, self.SHAPES_PER_SIZE, n)
+        self.count = end
+        
+    def edge_positions(self, n):
+        """Pick n random points along the screen edges"""
+        edge = self.rng.integers(0, 4, n)
+        along_x = self.rng.integers(0, WIDTH + 1, n)
+        along_y = self.rng.integers(0, HEIGHT + 1, n)
+        x = np.select([edge == 0, edge == 1, edge == 2], [along_x, WIDTH, along_x], 0)
+        y = np.select([edge == 0, edge == 1, edge == 2], [0, along_y, HEIGHT], along_y)
+        return x.astype(float), y.astype(float)
+        
+    def spawn(self, n, size=3):
+        """Add n rocks at random edge locations"""
+        x, y = self.edge_positions(n)
+        self.add(x, y, size)
+        
+    def update(self, dt=1.0):
+        n = self.count
+        position = self.position[:n]
+        self.last_position[:n] = position
+        position += self.velocity[:n] * dt
         
         # Wrap around screen edges
-        if self.position[0] < -self.radius:
-            self.position[0] = WIDTH + self.radius
-        elif self.position[0] > WIDTH + self.radius:
-            self.position[0] = -self.radius
-            
-        if self.position[1] < -self.radius:
-            self.position[1] = HEIGHT + self.radius
-        elif self.position[1] > HEIGHT + self.radius:
-            self.position[1] = -self.radius
-            
-    def break_apart(self):
-        # Return a list of smaller asteroids
-        if self.size <= 1:  # Already the smallest
-            return []
+        radius = self.radius[:n]
+        x, y = position[:, 0], position[:, 1]
+        x[x < -radius] = (WIDTH + radius)[x < -radius]
+        x[x > WIDTH + radius] = -radius[x > WIDTH + radius]
+        y[y < -radius] = (HEIGHT + radius)[y < -radius]
+        y[y > HEIGHT + radius] = -radius[y > HEIGHT + radius]
+        
+    def split(self, indices):
+        """Break the given rocks into two smaller fragments each (appended at the end)"""
+        indices = np.asarray(indices, dtype=np.intp)
+        indices = indices[self.size[indices] > 1]  # Smallest rocks just disappear
+        parents = np.repeat(indices, 2)
+        n = len(parents)
+        if n == 0:
+            return
+        x = self.position[parents, 0] + self.rng.uniform(-10, 10, n)
+        y = self.position[parents, 1] + self.rng.uniform(-10, 10, n)
+        self.add(x, y, self.size[parents] - 1)
+        
+    def remove(self, indices):
+        """Drop the given rocks, keeping the order of the rest"""
+        if len(indices) == 0:
+            return
+        keep = np.ones(self.count, dtype=bool)
+        keep[np.asarray(indices, dtype=np.intp)] = False
+        n = int(keep.sum())
+        for name in ('position', 'last_position', 'velocity', 'radius', 'size', 'shape'):
+            array = getattr(self, name)
+            array[:n] = array[:self.count][keep]
+        self.count = n
+        
+    def clear(self):
+        self.count = 0
+        
+    def view(self, index):
+        x, y = self.position[index]
+        return AsteroidView(index, (float(x), float(y)), float(self.radius[index]), int(self.size[index]))
+        
+    def overlapping(self, x, y, radius):
+        """Boolean mask of rocks overlapping a circle"""
+        n = self.count
+        dx = self.position[:n, 0] - x
+        dy = self.position[:n, 1] - y
+        return dx*dx + dy*dy < (self.radius[:n] + radius) ** 2
+        
+    def render_positions(self, alpha=1.0):
+        """Positions blended between the last two ticks, snapping across screen wraps"""
+        n = self.count
+        previous, current = self.last_position[:n], self.position[:n]
+        delta = current - previous
+        blended = previous + delta * alpha
+        wrapped = np.abs(delta) > (WIDTH / 2, HEIGHT / 2)
+        return np.where(wrapped, current, blended)
+        
+    def draw(self, alpha=1.0):
+        shapes = self.shapes
+        for (x, y), shape in zip(self.render_positions(alpha).tolist(), self.shape[:self.count].tolist()):
+            pygame.draw.polygon(game_surface, WHITE, (shapes[shape] + (x, y)).tolist(), 1)
             
-        fragments = []
-        for _ in range(2):  # Create two smaller fragments
-            fragments.append(Asteroid(
-                self.position[0] + random.uniform(-10, 10), 
-                self.position[1] + random.uniform(-10, 10),
-                self.size - 1
-            ))
-        return fragments
+    def bounds(self, alpha=1.0):
+        """Screen areas draw() covers, one rect per rock"""
+        radius = self.radius[:self.count] * 1.2 + 2  # Outlines stick out up to 20% past the radius
+        corners = (self.render_positions(alpha) - radius[:, None]).astype(int).tolist()
+        sides = (2 * radius).astype(int).tolist()
+        return [pygame.Rect(x, y, side, side) for (x, y), side in zip(corners, sides)]
 
 class UFO:
-    def __init__(self):
+    def __init__(self, rng=None, ai_rng=None):
+        rng = rng if rng is not None else np.random.default_rng()  # Where it enters
+        self.rng = ai_rng if ai_rng is not None else rng  # How it flies and aims
+        
         # Randomly decide to start from left or right
-        if random.choice([True, False]):
-            self.position = [-20, random.randint(50, HEIGHT - 50)]
-            self.velocity = [random.uniform(2, 4), random.uniform(-1, 1)]
+        if rng.integers(2):
+            self.position = [-20, int(rng.integers(50, HEIGHT - 49))]
+            self.velocity = [float(rng.uniform(2, 4)), float(rng.uniform(-1, 1))]
         else:
-            self.position = [WIDTH + 20, random.randint(50, HEIGHT - 50)]
-            self.velocity = [random.uniform(-4, -2), random.uniform(-1, 1)]
+            self.position = [WIDTH + 20, int(rng.integers(50, HEIGHT - 49))]
+            self.velocity = [float(rng.uniform(-4, -2)), float(rng.uniform(-1, 1))]
             
+        self.last_position = self.position.copy()  # Position before the last update, for interpolation
         self.radius = 15
         self.shoot_timer = 0
-        self.shoot_delay = random.randint(60, 120)  # Frames between shots
+        self.shoot_delay = int(self.rng.integers(60, 121))  # Frames between shots
+        
+    def draw(self, alpha=1.0):
+        x, y = interpolate_position(self.last_position, self.position, alpha)
         
-    def draw(self):
         # Draw UFO
-        pygame.draw.ellipse(game_surface, RED, (self.position[0] - self.radius, 
-                                         self.position[1] - self.radius/2,
+        pygame.draw.ellipse(game_surface, RED, (x - self.radius, 
+                                         y - self.radius/2,
                                          self.radius*2, self.radius))
         # Draw top dome
-        pygame.draw.ellipse(game_surface, RED, (self.position[0] - self.radius/2, 
-                                         self.position[1] - self.radius,
+        pygame.draw.ellipse(game_surface, RED, (x - self.radius/2, 
+                                         y - self.radius,
                                          self.radius, self.radius/2))
         
-    def update(self, players):
+    def bounds(self, alpha=1.0):
+        """Screen area draw() covers"""
+        x, y = interpolate_position(self.last_position, self.position, alpha)
+        return circle_bounds(x, y, self.radius)
+        
+    def update(self, players, dt=1.0):
+        self.last_position[0] = self.position[0]
+        self.last_position[1] = self.position[1]
+        
         # Update position
-        self.position[0] += self.velocity[0]
-        self.position[1] += self.velocity[1]
+        self.position[0] += self.velocity[0] * dt
+        self.position[1] += self.velocity[1] * dt
         
         # Bounce off top and bottom
         if self.position[1] < self.radius or self.position[1] > HEIGHT - self.radius:
             self.velocity[1] = -self.velocity[1]
             
         # Randomly adjust vertical movement occasionally
-        if random.random() < 0.02:
-            self.velocity[1] = random.uniform(-1, 1)
+        if self.rng.random() < 0.02 * dt:
+            self.velocity[1] = float(self.rng.uniform(-1, 1))
             
         # Update shoot timer
-        self.shoot_timer += 1
+        self.shoot_timer += dt
         
         # Return None if it's not time to shoot yet
         if self.shoot_timer < self.shoot_delay:
@@ -1028,7 +1909,7 @@ class UFO:
             
         # Reset the timer
         self.shoot_timer = 0
-        self.shoot_delay = random.randint(60, 120)
+        self.shoot_delay = int(self.rng.integers(60, 121))
         
         # Pick the closest player to target
         if len(players) > 1 and all(player.lives > 0 for player in players):
@@ -1049,12 +1930,12 @@ class UFO:
         angle = math.atan2(dy, dx)
         
         # Add some inaccuracy
-        angle += random.uniform(-0.5, 0.5)
+        angle += float(self.rng.uniform(-0.5, 0.5))
         
         bullet_vx = 5 * math.cos(angle)
         bullet_vy = 5 * math.sin(angle)
         
-        return Bullet(self.position[0], self.position[1], bullet_vx, bullet_vy, 
+        return bullet_pool.acquire(self.position[0], self.position[1], bullet_vx, bullet_vy, 
               is_nuke=False, player_id=-1, source="ufo")
         
     def is_off_screen(self):
@@ -1066,193 +1947,1308 @@ class UFO:
                             (self.position[1] - obj.position[1])**2)
         return distance < self.radius + obj.radius
 
-class Particle:
-    def __init__(self, x, y, color=WHITE):
-        self.position = [x, y]
-        angle = random.uniform(0, 2 * math.pi)
-        speed = random.uniform(1, 3)
-        self.velocity = [speed * math.cos(angle), speed * math.sin(angle)]
-        self.lifetime = random.randint(10, 30)
-        self.size = random.randint(1, 3)
-        self.color = color
-        
-    def update(self):
-        self.position[0] += self.velocity[0]
-        self.position[1] += self.velocity[1]
-        self.lifetime -= 1
-        self.velocity[0] *= 0.95
-        self.velocity[1] *= 0.95
-        
-    def draw(self):
-        alpha = int(255 * (self.lifetime / 30.0))
-        color = (*self.color, alpha) if len(self.color) == 3 else (self.color[0], self.color[1], self.color[2], alpha)
-        surf = pygame.Surface((self.size * 2, self.size * 2), pygame.SRCALPHA)
-        pygame.draw.circle(surf, color, (self.size, self.size), self.size)
-        game_surface.blit(surf, (int(self.position[0] - self.size), int(self.position[1] - self.size)))
-        
-    def is_dead(self):
-        return self.lifetime <= 0
+def render_particle(key):
+    """Draw a translucent particle disc for a (r, g, b, size, alpha) key"""
+    r, g, b, size, alpha = key
+    surf = pygame.Surface((size * 2, size * 2), pygame.SRCALPHA)
+    pygame.draw.circle(surf, (r, g, b, alpha), (size, size), size)
+    return surf
 
-def create_explosion(x, y, size, color=WHITE):
-    particles = []
-    num_particles = 10 if size == 1 else (20 if size == 2 else 30)
+class ParticleSystem:
+    """Fixed-capacity particle pool stored as parallel NumPy arrays and updated in bulk"""
+    MAX_LIFETIME = 30
+    ALPHA_LEVELS = 16  # Fade steps particles are drawn with; each is a cached sprite
+    sprites = SpriteCache(render_particle)  # Shared by every pool
     
-    for _ in range(num_particles):
-        particles.append(Particle(x, y, color))
-        
-    return particles
+    def __init__(self, capacity=4096, rng=None):
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.count = 0
+        self.position = np.zeros((capacity, 2))
+        self.last_position = np.zeros((capacity, 2))  # Position before the last update, for interpolation
+        self.velocity = np.zeros((capacity, 2))
+        self.lifetime = np.zeros(capacity)
+        self.size = np.zeros(capacity, dtype=np.int8)
+        self.color = np.zeros((capacity, 3), dtype=np.uint8)
+        
+    def __len__(self):
+        return self.count
+        
+    def emit(self, x, y, color=WHITE):
+        """Add one particle at each of the given points; color is one RGB triple or one per particle"""
+        x = np.atleast_1d(np.asarray(x, dtype=float))
+        y = np.broadcast_to(np.asarray(y, dtype=float), x.shape)
+        start = self.count
+        n = min(len(x), len(self.lifetime) - start)
+        if n <= 0:
+            return
+        end = start + n
+        
+        self.position[start:end, 0] = x[:n]
+        self.position[start:end, 1] = y[:n]
+        self.last_position[start:end] = self.position[start:end]
+        angle = self.rng.uniform(0, 2 * np.pi, n)
+        speed = self.rng.uniform(1, 3, n)
+        self.velocity[start:end, 0] = speed * np.cos(angle)
+        self.velocity[start:end, 1] = speed * np.sin(angle)
+        self.lifetime[start:end] = self.rng.integers(10, self.MAX_LIFETIME + 1, n)
+        self.size[start:end] = self.rng.integers(1, 4, n)
+        color = np.asarray(color, dtype=np.uint8).reshape(-1, 3)[:, :3]
+        self.color[start:end] = color if len(color) == 1 else color[:n]
+        self.count = end
+        
+    def explode(self, x, y, size, color=WHITE):
+        """Burst of particles at one or more points, bigger for bigger asteroid sizes"""
+        x = np.atleast_1d(np.asarray(x, dtype=float))
+        y = np.broadcast_to(np.asarray(y, dtype=float), x.shape)
+        size = np.broadcast_to(np.asarray(size), x.shape)
+        counts = np.select([size == 1, size == 2], [10, 20], 30)
+        self.emit(np.repeat(x, counts), np.repeat(y, counts), color)
+        
+    def bounds(self, alpha=1.0):
+        """Screen areas draw() covers, one rect per particle"""
+        n = self.count
+        previous = self.last_position[:n]
+        size = self.size[:n].astype(int)
+        corners = (previous + (self.position[:n] - previous) * alpha).astype(int) - size[:, None] - 1
+        sides = 2 * size + 2
+        return [pygame.Rect(x, y, side, side) for (x, y), side in zip(corners.tolist(), sides.tolist())]
+        
+    def update(self, dt=1.0):
+        n = self.count
+        self.last_position[:n] = self.position[:n]
+        self.position[:n] += self.velocity[:n] * dt
+        self.velocity[:n] *= 0.95 ** dt
+        self.lifetime[:n] -= dt
+        
+        # Cull dead particles, packing the survivors at the front
+        alive = self.lifetime[:n] > 0
+        if alive.all():
+            return
+        n = int(alive.sum())
+        for name in ('position', 'last_position', 'velocity', 'lifetime', 'size', 'color'):
+            array = getattr(self, name)
+            array[:n] = array[:self.count][alive]
+        self.count = n
+        
+    def clear(self):
+        self.count = 0
+        
+    def draw(self, alpha=1.0):
+        n = self.count
+        previous = self.last_position[:n]
+        positions = previous + (self.position[:n] - previous) * alpha
+        
+        # Quantize the fade so particles share a small set of pre-rendered sprites
+        steps = self.ALPHA_LEVELS - 1
+        fades = np.ceil(steps * np.clip(self.lifetime[:n] / self.MAX_LIFETIME, 0, 1)).astype(int) * 255 // steps
+        sprites = self.sprites
+        game_surface.blits([(sprites.get((r, g, b, size, fade)), (int(x - size), int(y - size)))
+                            for (x, y), size, (r, g, b), fade in zip(positions.tolist(), self.size[:n].tolist(),
+                                                                     self.color[:n].tolist(), fades.tolist())],
+                           doreturn=False)
 
-def draw_title_screen(background_asteroids, selected_button_index=0):
-    # Clear screen
-    game_surface.fill(BLACK)
-    
-    # Draw background asteroids
-    for asteroid in background_asteroids:
-        asteroid.draw()
-    
-    # Draw title
-    title_text = title_font.render("aSteroids", True, WHITE)
-    game_surface.blit(title_text, (WIDTH // 2 - title_text.get_width() // 2, HEIGHT // 4))
-    
-    # Create menu buttons
-    single_button = Button(WIDTH // 2 - 100, HEIGHT // 2 - 35, 200, 50, "Single Player", font)
-    coop_button = Button(WIDTH // 2 - 100, HEIGHT // 2 + 35, 200, 50, "Co-op Mode", font)
-    scores_button = Button(WIDTH // 2 - 100, HEIGHT // 2 + 105, 200, 50, "High Scores", font)
-    
-    # Set which button is selected based on the index
-    single_button.is_selected = selected_button_index == 0
-    coop_button.is_selected = selected_button_index == 1
-    scores_button.is_selected = selected_button_index == 2
-    
-    # Check for mouse hover
-    mouse_pos = pygame.mouse.get_pos()
-    single_button.check_hover(mouse_pos)
-    coop_button.check_hover(mouse_pos)
-    scores_button.check_hover(mouse_pos)
-    
-    # Draw buttons
-    single_button.draw()
-    coop_button.draw()
-    scores_button.draw()
-    
-    # Draw version number in bottom left corner
-    version_text = pygame.font.Font(None, 24).render("v0.81", True, GREY)
-    game_surface.blit(version_text, (10, HEIGHT - version_text.get_height() - 10))
-    
-    # Draw controller instructions if controllers are available
-    if joystick.get_count() > 0:
-        controls_text = pygame.font.Font(None, 24).render("Controller Ready", True, GREEN)
-        game_surface.blit(controls_text, (WIDTH - controls_text.get_width() - 10, HEIGHT - controls_text.get_height() - 10))
-    
-    # Return button objects for event handling
-    return single_button, coop_button, scores_button
+def expand_ranges(starts, ends):
+    """Concatenate the integer ranges [start, end), also returning which range each value came from"""
+    counts = np.maximum(ends - starts, 0)
+    owners = np.repeat(np.arange(len(starts)), counts)
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    return owners, np.repeat(starts, counts) + offsets
 
-def draw_high_scores_screen(scores, background_asteroids):
-    # Clear screen
-    game_surface.fill(BLACK)
-    
-    # Draw background asteroids
-    for asteroid in background_asteroids:
-        asteroid.draw()
-    
-    # Draw title
-    title_text = big_font.render("High Scores", True, WHITE)
-    game_surface.blit(title_text, (WIDTH // 2 - title_text.get_width() // 2, HEIGHT // 8))
-    
-    # Draw scores
-    y_pos = HEIGHT // 4
-    for i, (name, score, date, game_mode) in enumerate(scores):
-        # Add (Coop) indicator for cooperative mode scores
-        mode_indicator = " (Coop)" if game_mode == 'coop' else ""
-        score_text = font.render(f"{i+1}. {name}: {score}{mode_indicator}", True, WHITE)
-        date_text = font.render(date, True, GREY)
-        
-        game_surface.blit(score_text, (WIDTH // 2 - 150, y_pos))
-        game_surface.blit(date_text, (WIDTH // 2 + 100, y_pos))
-        
-        y_pos += 40
+class Broadphase:
+    """Finds candidate circle overlaps, across screen edges too, for an exact check to confirm"""
+    # Below this many query x indexed pairs, testing them all is cheaper
+    # than walking the spatial structure
+    BRUTE_FORCE_PAIRS = 4096
     
-    # Draw back button
-    back_button = Button(WIDTH // 2 - 100, HEIGHT * 3 // 4, 200, 50, "Back to Menu", font)
-    back_button.is_selected = True  # Always selected since it's the only button
-    mouse_pos = pygame.mouse.get_pos()
-    back_button.check_hover(mouse_pos)
-    back_button.draw()
-    
-    return back_button
+    def __init__(self, width=None, height=None):
+        self.width = width or WIDTH
+        self.height = height or HEIGHT
+        self.x = self.y = self.radius = np.zeros(0)
+        
+    def build(self, x, y, radius):
+        self.x = np.asarray(x, dtype=float)
+        self.y = np.asarray(y, dtype=float)
+        self.radius = np.asarray(radius, dtype=float)
+        
+    def candidates(self, x, y, radius):
+        """Possibly overlapping (query, indexed) index arrays, duplicates allowed"""
+        raise NotImplementedError
+        
+    def pairs(self, x, y, radius):
+        """Overlapping (query, indexed) index arrays, ordered by indexed then query index"""
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        radius = np.asarray(radius, dtype=float)
+        if len(x) == 0 or len(self.x) == 0:
+            return np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.intp)
+        if len(x) * len(self.x) <= self.BRUTE_FORCE_PAIRS:
+            queries, indexed = (grid.ravel() for grid in np.indices((len(x), len(self.x))))
+        else:
+            queries, indexed = self.candidates(x, y, radius)
+        
+        # Exact bounding box test, measuring the shortest way around the screen
+        reach = self.radius[indexed] + radius[queries]
+        dx = np.abs(self.x[indexed] - x[queries]) % self.width
+        dy = np.abs(self.y[indexed] - y[queries]) % self.height
+        overlap = ((np.minimum(dx, self.width - dx) <= reach) &
+                   (np.minimum(dy, self.height - dy) <= reach))
+                   
+        keys = np.unique(indexed[overlap] * len(x) + queries[overlap])
+        return keys % max(len(x), 1), keys // max(len(x), 1)
+        
+    def query(self, x, y, radius):
+        """Sorted indices of indexed circles overlapping a single circle"""
+        return self.pairs([x], [y], [radius])[1].tolist()
 
-def draw_name_input_screen(scores, text_inputs, background_asteroids, game_mode):
-    # Clear screen
-    game_surface.fill(BLACK)
-    
-    # Draw background asteroids
-    for asteroid in background_asteroids:
-        asteroid.draw()
-    
-    # Draw title
-    title_text = big_font.render("Game Over", True, RED)
-    game_surface.blit(title_text, (WIDTH // 2 - title_text.get_width() // 2, HEIGHT // 6))
+class UniformGrid(Broadphase):
+    """Broadphase bucketing circles into fixed-size cells that wrap at the screen edges"""
+    def __init__(self, width=None, height=None, cell_size=128):
+        super().__init__(width, height)
+        self.cols = max(1, math.ceil(self.width / cell_size))
+        self.rows = max(1, math.ceil(self.height / cell_size))
+        # Cells are stretched to tile the screen exactly, so wrapping a
+        # position and wrapping its cell index agree
+        self.cell_width = self.width / self.cols
+        self.cell_height = self.height / self.rows
+        self.cell_starts = np.zeros(self.cols * self.rows, dtype=np.intp)
+        self.cell_ends = np.zeros(self.cols * self.rows, dtype=np.intp)
+        self.entries = np.zeros(0, dtype=np.intp)
+        
+    def cell_entries(self, x, y, radius):
+        """(circle, cell key) arrays for every wrapped cell each bounding box covers"""
+        col_min = np.floor((x - radius) / self.cell_width).astype(np.intp)
+        col_max = np.floor((x + radius) / self.cell_width).astype(np.intp)
+        row_min = np.floor((y - radius) / self.cell_height).astype(np.intp)
+        row_max = np.floor((y + radius) / self.cell_height).astype(np.intp)
+        # A box wider than the screen covers every column (or row) once
+        cols = np.minimum(col_max - col_min + 1, self.cols)
+        rows = np.minimum(row_max - row_min + 1, self.rows)
+        
+        circles, keys = [np.zeros(0, dtype=np.intp)], [np.zeros(0, dtype=np.intp)]
+        for dc in range(int(cols.max(initial=0))):
+            for dr in range(int(rows.max(initial=0))):
+                covered = np.flatnonzero((dc < cols) & (dr < rows))
+                circles.append(covered)
+                keys.append((col_min[covered] + dc) % self.cols * self.rows +
+                            (row_min[covered] + dr) % self.rows)
+        return np.concatenate(circles), np.concatenate(keys)
+        
+    def build(self, x, y, radius):
+        super().build(x, y, radius)
+        circles, keys = self.cell_entries(self.x, self.y, self.radius)
+        order = np.argsort(keys, kind='stable')
+        self.entries = circles[order]
+        
+        # Each cell's entries form one slice of the sorted list
+        cell_keys = np.arange(self.cols * self.rows)
+        self.cell_starts = np.searchsorted(keys[order], cell_keys, side='left')
+        self.cell_ends = np.searchsorted(keys[order], cell_keys, side='right')
+        
+    def candidates(self, x, y, radius):
+        queries, keys = self.cell_entries(x, y, radius)
+        owners, positions = expand_ranges(self.cell_starts[keys], self.cell_ends[keys])
+        return queries[owners], self.entries[positions]
+
+class SweepAndPrune(Broadphase):
+    """Broadphase keeping circles sorted along x and scanning the overlapping span"""
+    def __init__(self, width=None, height=None):
+        super().__init__(width, height)
+        self.order = np.zeros(0, dtype=np.intp)
+        self.sorted_x = np.zeros(0)
+        self.max_radius = 0.0
+        
+    def build(self, x, y, radius):
+        super().build(x, y, radius)
+        wrapped_x = self.x % self.width
+        self.order = np.argsort(wrapped_x, kind='stable')
+        self.sorted_x = wrapped_x[self.order]
+        self.max_radius = float(self.radius.max(initial=0))
+        
+    def candidates(self, x, y, radius):
+        x = x % self.width
+        reach = radius + self.max_radius
+        low, high = x - reach, x + reach
+        
+        # Scan each sorted span, plus its wrapped copy when it crosses a screen edge
+        spans = [(low, high),
+                 (np.where(low < 0, low + self.width, np.inf), self.width),
+                 (0, np.where(high > self.width, high - self.width, -np.inf))]
+        queries, indexed = [], []
+        for span_low, span_high in spans:
+            starts = np.searchsorted(self.sorted_x, np.broadcast_to(span_low, x.shape), side='left')
+            ends = np.searchsorted(self.sorted_x, np.broadcast_to(span_high, x.shape), side='right')
+            owners, positions = expand_ranges(starts, ends)
+            queries.append(owners)
+            indexed.append(self.order[positions])
+        return np.concatenate(queries), np.concatenate(indexed)
+
+# Available broadphase implementations, chosen with ASTEROIDS_BROADPHASE
+BROADPHASES = {'grid': UniformGrid, 'sap': SweepAndPrune}
+BROADPHASE = os.environ.get('ASTEROIDS_BROADPHASE', 'sap')
+
+class World:
+    """Headless gameplay simulation for GAME_PLAYING, advanced one fixed tick per step()"""
+    def __init__(self, game_mode=SINGLE_PLAYER, tick_rate=TICK_RATE, broadphase=BROADPHASE, seed=None):
+        self.game_mode = game_mode
+        self.tick_rate = tick_rate
+        self.broadphase = broadphase
+        self.dt = BASE_TICK_RATE / tick_rate  # Tick length in base frames
+        self.rng = RandomStreams(seed)
+        self.seed = self.rng.seed
+        self.players = ([Player(tick_rate=tick_rate)] if game_mode == SINGLE_PLAYER else
+                        [Player(0, tick_rate), Player(1, tick_rate)])
+        self.asteroids = AsteroidField(rng=self.rng.spawning, shape_rng=self.rng.shapes)
+        self.asteroids.spawn(4)
+        self.bullets = EntityList(bullet_pool.release)
+        self.ufos = EntityList()
+        self.particles = ParticleSystem(rng=self.rng.particles)
+        self.powerups = EntityList()
+        self.laser_beams = EntityList()
+        self.scores = [0, 0]
+        self.level = 1
+        
+        # Spatial indexes for the collision loops
+        self.asteroid_index = BROADPHASES[broadphase]()
+        self.bullet_index = BROADPHASES[broadphase]()
+        
+        # Simulation clock, advanced by one tick per step
+        self.tick = 0
+        
+        # Game timing variables, all in ticks
+        self.shot_cooldown = ms_to_ticks(SHOT_COOLDOWN, tick_rate)
+        self.rapid_fire_cooldown = ms_to_ticks(RAPID_FIRE_COOLDOWN, tick_rate)
+        self.last_shot_times = [-math.inf, -math.inf]  # One for each player
+        self.ufo_spawn_timer = 0
+        self.ufo_spawn_delay = self.random_ufo_delay()
+        self.powerup_spawn_timer = 0
+        self.powerup_spawn_delay = ms_to_ticks(POWERUP_SPAWN_RATE * 1000, tick_rate)
+        
+        # Events raised during the last step, consumed by the caller
+        self.game_over = False
+        self.nuke_flash = False
+        
+    def random_ufo_delay(self):
+        low, high = UFO_SPAWN_DELAY_RANGE
+        return ms_to_ticks(int(self.rng.spawning.integers(low, high + 1)), self.tick_rate)
+        
+    def digest(self):
+        """Fingerprint of the simulation state, equal for runs that stayed in step"""
+        n = len(self.asteroids)
+        state = hashlib.sha256()
+        state.update(repr((self.tick, self.level, self.scores, self.game_over)).encode())
+        for player in self.players:
+            state.update(repr((player.position, player.velocity, player.rotation, player.lives,
+                               player.invulnerable, player.is_invincible, player.active_powerup)).encode())
+        for name in ('position', 'velocity', 'size', 'shape'):
+            state.update(getattr(self.asteroids, name)[:n].tobytes())
+        for bullet in self.bullets:
+            state.update(repr((bullet.position, bullet.velocity, bullet.lifetime)).encode())
+        for ufo in self.ufos:
+            state.update(repr((ufo.position, ufo.velocity, ufo.shoot_timer)).encode())
+        for powerup in self.powerups:
+            state.update(repr((powerup.x, powerup.y, powerup.type)).encode())
+        state.update(self.particles.position[:len(self.particles)].tobytes())
+        return state.hexdigest()
+        
+    def step(self, inputs):
+        """Advance the simulation one tick; inputs holds one INPUT_* bitmask per player"""
+        dt = self.dt
+        self.tick += 1
+        self.nuke_flash = False
+        
+        for player_id, player in enumerate(self.players):
+            if player.lives > 0 and player_id < len(inputs):
+                self.apply_input(player_id, inputs[player_id])
+        
+        # Update players
+        for player in self.players:
+            if player.lives > 0:
+                player.update(self.tick, dt)
+                
+        self.update_bullets()
+        self.update_laser_beams()
+        self.update_powerups()
+        self.update_asteroids()
+        self.update_ufos()
+        
+        self.particles.update(dt)
+                
+        self.check_level_complete()
+        self.spawn_enemies()
+        
+        # Drop everything killed this tick in one pass
+        for entities in (self.bullets, self.ufos, self.powerups, self.laser_beams):
+            entities.compact()
+        
+    def apply_input(self, player_id, bits):
+        player = self.players[player_id]
+        
+        if bits & INPUT_LEFT:
+            player.rotate(-1, self.dt)
+        if bits & INPUT_RIGHT:
+            player.rotate(1, self.dt)
+        if bits & INPUT_THRUST:
+            player.thrust(self.dt)
+            if player_id == 0:
+                play_sound('thrust')  # Keeps one thrust voice going while held
+                
+        if bits & INPUT_FIRE:
+            # Only handle shooting if no laser beam is active for this player
+            if not any(beam.player_id == player_id for beam in self.laser_beams):
+                # If rapid fire is active, don't apply cooldown
+                if player.active_powerup == 'rapid_fire' and player.rapid_fire_ammo > 0:
+                    self.fire(player_id)
+                # Handle shooting with cooldown for other weapons
+                elif self.tick - self.last_shot_times[player_id] > self.shot_cooldown:
+                    self.fire(player_id)
+                    
+        # Rapid fire keeps shooting while the button is held
+        if (bits & INPUT_FIRE_HELD and player.active_powerup == 'rapid_fire' and
+                player.rapid_fire_ammo > 0):
+            if self.tick - self.last_shot_times[player_id] > self.rapid_fire_cooldown:
+                self.fire(player_id)
+                
+    def fire(self, player_id):
+        result = self.players[player_id].shoot()
+        
+        # Handle different return types
+        if result == "laser":
+            self.laser_beams.append(LaserBeam(self.players[player_id]))
+            play_sound('laser')
+        elif isinstance(result, Bullet):
+            self.bullets.append(result)
+            if not result.is_nuke:
+                play_sound('shoot')
+            self.last_shot_times[player_id] = self.tick
+            
+    def award(self, player_id, points):
+        self.players[player_id].score += points
+        self.scores[player_id] += points
+        
+    def kill_player(self, player):
+        player.lives -= 1
+        
+        # Check for game over - only if lives reach zero
+        if (self.game_mode == SINGLE_PLAYER and player.lives <= 0) or all(p.lives <= 0 for p in self.players):
+            self.game_over = True
+        elif player.lives > 0:
+            # Only respawn if the player still has lives
+            player.respawn(self.tick)
+            
+    def update_bullets(self):
+        for bullet in self.bullets:
+            bullet.update(self.dt)
+            
+            # Check for nuclear bomb impact
+            if bullet.is_nuke and bullet.lifetime < 56:  # Give a bit of time before nuke can explode
+                exploded = False
+                
+                # Check collision with any asteroid
+                if self.asteroids.overlapping(bullet.position[0], bullet.position[1], bullet.radius).any():
+                    exploded = True
+                        
+                # Check collision with any UFO
+                for ufo in self.ufos:
+                    if ufo.check_collision(bullet):
+                        if len(self.ufos) == 1:
+                            stop_sound('ufo')
+                        exploded = True
+                        play_sound('explosion_medium')
+                        break
+                        
+                # If nuke exploded or lifetime is almost over, trigger nuclear explosion
+                if exploded or bullet.lifetime < 4:
+                    self.detonate_nuke(bullet)
+                    break
+                    
+            if bullet.is_dead():
+                self.bullets.kill(bullet)
+                
+    def detonate_nuke(self, bullet):
+        # Stop the nuke firing sound if it's playing
+        if bullet.sound_channel:
+            bullet.sound_channel.stop()
+            
+        # Play the nuke explosion sound and let the renderer flash the screen
+        play_sound('nuke')
+        self.nuke_flash = True
+        
+        # Generate explosion particles
+        rng = self.particles.rng
+        self.particles.emit(rng.integers(0, WIDTH + 1, 100), rng.integers(0, HEIGHT + 1, 100),
+                            np.array([RED, YELLOW, WHITE])[rng.integers(0, 3, 100)])
+            
+        # Destroy all asteroids and UFOs on screen, crediting the player who fired
+        field = self.asteroids
+        n = field.count
+        self.award(bullet.player_id, int((4 - field.size[:n].astype(int)).sum()) * 100)
+        self.particles.explode(field.position[:n, 0], field.position[:n, 1], field.size[:n])
+        field.clear()
+        
+        for ufo in self.ufos:
+            self.award(bullet.player_id, 1000)
+            self.particles.explode(ufo.position[0], ufo.position[1], 2)
+        self.ufos.clear()
+        
+        # Remove all bullets, the nuke included
+        self.bullets.clear()
+        
+    def update_laser_beams(self):
+        for laser_beam in self.laser_beams:
+            finished = laser_beam.update(self.dt)
+            player_id = laser_beam.player_id
+            color = YELLOW if player_id == 0 else CYAN
+            
+            # Check for asteroid destruction by laser
+            field = self.asteroids
+            hit = np.flatnonzero(laser_beam.check_field(field))
+            for (x, y), size in zip(field.position[hit].tolist(), field.size[hit].tolist()):
+                play_explosion_sound(size)
+                self.award(player_id, (4 - size) * 100)
+                self.particles.explode(x, y, size, color)
+                
+            # Break the asteroids
+            field.split(hit)
+            field.remove(hit)
+                    
+            # Check for UFO destruction by laser
+            for ufo in self.ufos:
+                if laser_beam.check_collision(ufo):
+                    self.award(player_id, 1000)
+                    self.particles.explode(ufo.position[0], ufo.position[1], 2, color)
+                    self.ufos.kill(ufo)
+                    
+            # Remove the laser beam once it runs out
+            if finished:
+                self.laser_beams.kill(laser_beam)
+                
+    def update_powerups(self):
+        for powerup in self.powerups:
+            if powerup.update(self.dt):
+                self.powerups.kill(powerup)
+                continue
+                
+            # Check if any player collected the powerup
+            for player in self.players:
+                if player.lives > 0 and powerup.check_collision(player):
+                    player.collect_powerup(powerup.type, self.tick)
+                    self.particles.explode(
+                        powerup.x, powerup.y, 2,
+                        PowerUp.COLORS[powerup.type]
+                    )
+                    self.powerups.kill(powerup)
+                    break
+                    
+    def update_asteroids(self):
+        field = self.asteroids
+        field.update(self.dt)  # Fragments spawned this tick are appended after these
+        
+        # Index asteroids so only nearby pairs get an exact check
+        n = field.count
+        self.asteroid_index.build(field.position[:n, 0], field.position[:n, 1], field.radius[:n])
+        
+        players = [p for p in self.players if p.lives > 0]
+        player_candidates = self.candidates_by_asteroid(
+            [(p.position[0], p.position[1], p.radius) for p in players],
+            [self.players.index(p) for p in players])
+            
+        destroyed = []  # Rocks removed this tick
+        broken = []     # Rocks that split into fragments
+        for a_idx in sorted(player_candidates):
+            asteroid = field.view(a_idx)
+            
+            # Check collision with players
+            for p_idx in player_candidates[a_idx]:
+                player = self.players[p_idx]
+                if player.lives <= 0:
+                    continue
+                    
+                if player.check_collision(asteroid):
+                    play_sound('player_explosion')
+                    self.particles.explode(player.position[0], player.position[1], 2)
+                    self.kill_player(player)
+                    
+                    play_explosion_sound(asteroid.size)
+                    self.particles.explode(asteroid.position[0], asteroid.position[1], asteroid.size)
+                    destroyed.append(a_idx)
+                    break
+                    
+                # Check if invincible player rammed into asteroid
+                elif player.is_invincible and self.overlaps(player, asteroid):
+                    play_explosion_sound(asteroid.size)
+                    self.award(p_idx, (4 - asteroid.size) * 100)
+                    
+                    # Create an explosion effect with player color
+                    color = PURPLE if p_idx == 0 else (128, 0, 255)  # Blend of purple and cyan
+                    self.particles.explode(asteroid.position[0], asteroid.position[1], asteroid.size, color)
+                    
+                    destroyed.append(a_idx)
+                    broken.append(a_idx)
+                    break
+                    
+        # Sweep every bullet's path this tick against the remaining asteroids at once
+        bullets = list(self.bullets)
+        if bullets:
+            circles = np.array([self.swept_circle(bullet) for bullet in bullets])
+            bullet_ids, asteroid_ids = self.asteroid_index.pairs(circles[:, 0], circles[:, 1], circles[:, 2])
+            remaining = ~np.isin(asteroid_ids, destroyed)
+            hit_bullets, hit_asteroids = swept_hits(
+                [bullet.prev_position for bullet in bullets],
+                [bullet.position for bullet in bullets],
+                [bullet.radius for bullet in bullets],
+                field.position[:n], field.radius[:n],
+                bullet_ids[remaining], asteroid_ids[remaining])
+                
+            for b_idx, a_idx in zip(hit_bullets.tolist(), hit_asteroids.tolist()):
+                bullet = bullets[b_idx]
+                asteroid = field.view(a_idx)
+                stop_sound('nuke_fire')
+                self.award(bullet.player_id, (4 - asteroid.size) * 100)
+                self.particles.explode(asteroid.position[0], asteroid.position[1], asteroid.size)
+                play_sound('explosion_medium')
+                
+                # Break the asteroid, removing the bullet and asteroid
+                self.bullets.kill(bullet)
+                destroyed.append(a_idx)
+                broken.append(a_idx)
+                
+        field.split(broken)
+        field.remove(destroyed)
+        
+    def candidates_by_asteroid(self, circles, ids):
+        """Map asteroid index -> ids of the query circles that may touch it, in id order"""
+        circles = np.array(circles, dtype=float).reshape(-1, 3)
+        queries, asteroids = self.asteroid_index.pairs(circles[:, 0], circles[:, 1], circles[:, 2])
+        ids = list(ids)
+        candidates = {}
+        for query, a_idx in zip(queries.tolist(), asteroids.tolist()):
+            candidates.setdefault(a_idx, []).append(ids[query])
+        return candidates
+        
+    @staticmethod
+    def swept_circle(bullet):
+        """Circle around the span a bullet swept this tick"""
+        dx = bullet.position[0] - bullet.prev_position[0]
+        dy = bullet.position[1] - bullet.prev_position[1]
+        return (bullet.position[0] - dx / 2, bullet.position[1] - dy / 2,
+                bullet.radius + math.sqrt(dx*dx + dy*dy) / 2)
+                
+    def index_bullets(self, bullets):
+        """Index bullets by the span they swept this tick"""
+        circles = np.array([self.swept_circle(bullet) for bullet in bullets]).reshape(-1, 3)
+        self.bullet_index.build(circles[:, 0], circles[:, 1], circles[:, 2])
+        
+    def update_ufos(self):
+        bullets = None  # Indexed on first use, shared by every UFO this tick
+        for ufo in self.ufos:
+            ufo_bullet = ufo.update(self.players, self.dt)  # Pass all players for UFO targeting
+            
+            # Check if the UFO is off-screen
+            if ufo.is_off_screen():
+                self.ufos.kill(ufo)
+                if ufo_bullet:
+                    bullet_pool.release(ufo_bullet)
+                continue
+                
+            # Check collision with players
+            for p_idx, player in enumerate(self.players):
+                if player.lives <= 0:
+                    continue
+                    
+                if ufo.check_collision(player) and not player.is_invincible:
+                    self.particles.explode(player.position[0], player.position[1], 2)
+                    self.particles.explode(ufo.position[0], ufo.position[1], 2)
+                    self.kill_player(player)
+                    self.ufos.kill(ufo)
+                    break
+                    
+                # Check if invincible player rammed into UFO
+                elif player.is_invincible and self.overlaps(player, ufo):
+                    self.award(p_idx, 1000)
+                    color = PURPLE if p_idx == 0 else (128, 0, 255)  # Blend of purple and cyan
+                    self.particles.explode(ufo.position[0], ufo.position[1], 2, color)
+                    self.ufos.kill(ufo)
+                    break
+                    
+            # Check bullet collisions
+            if self.ufos.alive(ufo):
+                if bullets is None:
+                    bullets = list(self.bullets)
+                    self.index_bullets(bullets)
+                for b_idx in self.bullet_index.query(ufo.position[0], ufo.position[1], ufo.radius):
+                    bullet = bullets[b_idx]
+                    # Only check live player bullets against UFOs (ignore UFO bullets)
+                    if bullet.source != "ufo" and self.bullets.alive(bullet) and ufo.check_collision(bullet):
+                        self.award(bullet.player_id, 1000)
+                        self.particles.explode(ufo.position[0], ufo.position[1], 2)
+                        stop_sound('ufo')
+                        play_sound('ufo_explosion')
+                        play_sound('player_explosion')
+                        
+                        # Remove the bullet and UFO
+                        self.bullets.kill(bullet)
+                        self.ufos.kill(ufo)
+                        break
+                        
+            # UFO shooting
+            if self.ufos.alive(ufo) and ufo_bullet:  # Make sure it wasn't removed
+                self.bullets.append(ufo_bullet)
+                play_sound('ufo_shoot')
+            elif ufo_bullet:
+                bullet_pool.release(ufo_bullet)
+                
+    def check_level_complete(self):
+        if len(self.asteroids) > 0:
+            return
+            
+        stop_sound('ufo')
+        play_sound('menu_select')
+        self.level += 1
+        
+        # In co-op mode, revive dead players with 1 life at the start of the new level
+        if self.game_mode == COOPERATIVE:
+            for player in self.players:
+                if player.lives <= 0:
+                    player.lives = 1
+                    player.respawn(self.tick)
+                    
+        # Spawn more asteroids each level
+        for _ in range(4 + self.level):
+            # Make sure asteroids don't spawn directly on the player
+            while True:
+                x, y = self.asteroids.edge_positions(1)
+                if self.is_safe_spawn(x[0], y[0]):
+                    break
+            self.asteroids.add(x, y, 3)
+            
+    def spawn_enemies(self):
+        # Spawn UFO if it's time
+        if self.tick - self.ufo_spawn_timer > self.ufo_spawn_delay and len(self.ufos) < 1:
+            self.ufos.append(UFO(self.rng.spawning, self.rng.ufo))
+            play_sound('ufo')
+            self.ufo_spawn_timer = self.tick
+            self.ufo_spawn_delay = self.random_ufo_delay()
+            
+        # Spawn power-up if it's time
+        if self.tick - self.powerup_spawn_timer > self.powerup_spawn_delay and len(self.powerups) < 2:
+            # Choose a location away from all players
+            while True:
+                x = int(self.rng.spawning.integers(50, WIDTH - 49))
+                y = int(self.rng.spawning.integers(50, HEIGHT - 49))
+                if self.is_safe_spawn(x, y):
+                    break
+                    
+            self.powerups.append(PowerUp(x, y, rng=self.rng.spawning))
+            self.powerup_spawn_timer = self.tick
+            
+    def is_safe_spawn(self, x, y, safe_distance=100):
+        """Check that a spawn point keeps its distance from all active players"""
+        for player in self.players:
+            if player.lives > 0:
+                dx = x - player.position[0]
+                dy = y - player.position[1]
+                if math.sqrt(dx*dx + dy*dy) < safe_distance:
+                    return False
+        return True
+        
+    @staticmethod
+    def overlaps(a, b):
+        distance = math.sqrt((a.position[0] - b.position[0])**2 + 
+                             (a.position[1] - b.position[1])**2)
+        return distance < a.radius + b.radius
+        
+    def draw(self, alpha=1.0, dirty=None):
+        """Draw all entities between the last two ticks, adding their areas to dirty if given"""
+        # Composite every player's after-images in one pass beneath the ships
+        players = [player for player in self.players if player.lives > 0]
+        for player in players:
+            player.after_images.draw(effects_layer)
+        after_images = effects_layer.composite(game_surface)
+        
+        for player in players:
+            player.draw(alpha)
+        for laser_beam in self.laser_beams:
+            laser_beam.draw(alpha)
+        for bullet in self.bullets:
+            bullet.draw(alpha)
+        self.asteroids.draw(alpha)
+        for ufo in self.ufos:
+            ufo.draw(alpha)
+        for powerup in self.powerups:
+            powerup.draw(alpha)
+        self.particles.draw(alpha)
+        
+        if dirty is not None:
+            if after_images:
+                dirty.append(after_images)
+            for entities in (players, self.laser_beams, self.bullets, self.ufos, self.powerups):
+                dirty.extend(entity.bounds(alpha) for entity in entities)
+            dirty.extend(self.asteroids.bounds(alpha))
+            dirty.extend(self.particles.bounds(alpha))
+
+# Session recordings: the seed plus every tick's inputs, enough to replay a game
+REPLAY_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'replays')
+RECORD_REPLAYS = os.environ.get('ASTEROIDS_RECORD', '1') == '1'
+INPUT_BITS = 5  # Bits of one player's input in a packed tick
+
+def write_varint(out, value):
+    """Append a non-negative integer to a bytearray, 7 bits per byte"""
+    while value > 0x7f:
+        out.append(value & 0x7f | 0x80)
+        value >>= 7
+    out.append(value)
+
+def read_varint(data, pos):
+    """Decode a varint at pos, returning (value, position after it)"""
+    value = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+class InputRecorder:
+    """Writes a game's seed and per-tick inputs to a compact replay file as it is played"""
+    MAGIC = b'ARPL'
+    VERSION = 1
+    # Magic, version, game mode, tick rate, broadphase and display resolution;
+    # the world seed follows as a varint
+    HEADER = struct.Struct('<4sHBH4sHH')
     
-    # Draw scores
-    if game_mode == SINGLE_PLAYER:
-        # Single player score
-        score_text = font.render(f"Your Score: {scores[0]}", True, WHITE)
-        game_surface.blit(score_text, (WIDTH // 2 - score_text.get_width() // 2, HEIGHT // 3))
+    def __init__(self, world, path=None):
+        if path is None:
+            mode = 'single' if world.game_mode == SINGLE_PLAYER else 'coop'
+            os.makedirs(REPLAY_DIR, exist_ok=True)
+            path = os.path.join(REPLAY_DIR, f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{mode}.replay")
+        self.path = path
+        self.file = open(path, 'wb')
+        header = bytearray(self.HEADER.pack(self.MAGIC, self.VERSION, world.game_mode, world.tick_rate,
+                                            world.broadphase.encode(), DISPLAY_WIDTH, DISPLAY_HEIGHT))
+        write_varint(header, world.seed)
+        self.file.write(header)
+        self.inputs = 0  # Packed inputs of the last tick
+        self.held = 0  # Ticks those inputs have been held
+        
+    def record(self, inputs):
+        """Add one tick's INPUT_* bitmasks, as passed to World.step()"""
+        packed = 0
+        for i, bits in enumerate(inputs):
+            packed |= bits << (i * INPUT_BITS)
+        # One event per change: ticks the old inputs were held, then old XOR new
+        if packed != self.inputs:
+            event = bytearray()
+            write_varint(event, self.held)
+            write_varint(event, packed ^ self.inputs)
+            self.file.write(event)
+            self.inputs = packed
+            self.held = 0
+        self.held += 1
+        
+    def close(self, world):
+        """Finish the file with the state the recorded inputs led to"""
+        # A change of zero marks the end; the final digest follows
+        end = bytearray()
+        write_varint(end, self.held)
+        write_varint(end, 0)
+        self.file.write(end + bytes.fromhex(world.digest()))
+        self.file.close()
+
+def start_recording(world):
+    """An InputRecorder for a new game, or None if recording is off or fails"""
+    if not RECORD_REPLAYS:
+        return None
+    try:
+        return InputRecorder(world)
+    except OSError as e:
+        print(f"Not recording this game: {e}")
+        return None
+
+class Replay:
+    """A game read back from an InputRecorder file; play() re-runs it headless"""
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            data = f.read()
+        magic, version, self.game_mode, self.tick_rate, broadphase, width, height = \
+            InputRecorder.HEADER.unpack_from(data)
+        if magic != InputRecorder.MAGIC or version != InputRecorder.VERSION:
+            raise ValueError(f"{path} is not a version {InputRecorder.VERSION} replay")
+        self.broadphase = broadphase.rstrip(b'\0').decode()
+        self.resolution = (width, height)  # Of the display the game was played on
+        self.seed, pos = read_varint(data, InputRecorder.HEADER.size)
+        
+        self.runs = []  # (ticks held, packed inputs)
+        self.digest = None  # None if the file was cut short
+        packed = 0
+        try:
+            while True:
+                held, pos = read_varint(data, pos)
+                change, pos = read_varint(data, pos)
+                self.runs.append((held, packed))
+                if not change:
+                    self.digest = data[pos:pos + 32].hex() or None
+                    break
+                packed ^= change
+        except IndexError:
+            pass  # Truncated recording
+        self.ticks = sum(held for held, _ in self.runs)
+        
+    def inputs(self):
+        """Each tick's INPUT_* bitmasks, one list per tick"""
+        players = 1 if self.game_mode == SINGLE_PLAYER else 2
+        mask = (1 << INPUT_BITS) - 1
+        for held, packed in self.runs:
+            inputs = [packed >> (i * INPUT_BITS) & mask for i in range(players)]
+            for _ in range(held):
+                yield inputs
+                
+    def play(self):
+        """Run the recorded game headless and return the World it ends in"""
+        # Rocks wrap and spawn by the playfield size; create_app(AppConfig(resolution=...)) sets it
+        if letterbox(*self.resolution)[:2] != (WIDTH, HEIGHT):
+            raise ValueError(f"recorded on a {self.resolution[0]}x{self.resolution[1]} display, "
+                             f"but the playfield is sized for {DISPLAY_WIDTH}x{DISPLAY_HEIGHT}")
+        world = World(self.game_mode, self.tick_rate, self.broadphase, self.seed)
+        for inputs in self.inputs():
+            world.step(inputs)
+        return world
+
+def play_explosion_sound(size):
+    """Play the explosion sound matching an asteroid size"""
+    if size == 3:  # Large
+        play_sound('explosion_large')
+    elif size == 2:  # Medium
+        play_sound('explosion_medium')
+    else:  # Small
+        play_sound('explosion_small')
+
+class Scene:
+    """A menu screen whose buttons and labels are built once and only blitted each frame"""
+    def __init__(self):
+        self.buttons = []
         
-        # Draw name input prompt
-        prompt_text = font.render("Enter your name:", True, WHITE)
-        game_surface.blit(prompt_text, (WIDTH // 2 - prompt_text.get_width() // 2, HEIGHT // 2 - 60))
+    def clicked_button(self, pos, event):
+        """The button under a mouse click, or None"""
+        for button in self.buttons:
+            if button.is_clicked(pos, event):
+                return button
+        return None
         
-        # Draw text input
-        text_inputs[0].update()
-        text_inputs[0].draw()
-    else:
-        # Co-op mode, show both scores
-        p1_score_text = font.render(f"Player 1 Score: {scores[0]}", True, WHITE)
-        p2_score_text = font.render(f"Player 2 Score: {scores[1]}", True, CYAN)
+    def draw(self, background_asteroids):
+        # Clear screen
+        game_surface.fill(BLACK)
         
-        game_surface.blit(p1_score_text, (WIDTH // 2 - p1_score_text.get_width() // 2, HEIGHT // 4))
-        game_surface.blit(p2_score_text, (WIDTH // 2 - p2_score_text.get_width() // 2, HEIGHT // 3))
+        # Draw background asteroids
+        background_asteroids.draw()
         
-        # Draw name input prompts
-        p1_prompt = font.render("Player 1 name:", True, WHITE)
-        p2_prompt = font.render("Player 2 name:", True, CYAN)
+        mouse_pos = pygame.mouse.get_pos()
+        for button in self.buttons:
+            button.check_hover(mouse_pos)
+        self.draw_contents()
+        for button in self.buttons:
+            button.draw()
+            
+    def draw_contents(self):
+        pass
+        
+    @staticmethod
+    def blit_centered(surface, y):
+        game_surface.blit(surface, (WIDTH // 2 - surface.get_width() // 2, y))
+        
+    @staticmethod
+    def blit_bottom_right(surface):
+        game_surface.blit(surface, (WIDTH - surface.get_width() - 10, HEIGHT - surface.get_height() - 10))
+
+class LoadingScene(Scene):
+    BAR_WIDTH = 400
+    BAR_HEIGHT = 16
+    
+    def __init__(self):
+        super().__init__()
+        self.title_text = big_font.render("Loading...", True, WHITE)
+        self.skip_text = small_font.render("Press any key to skip", True, GREY)
+        self.progress = 0.0
+        
+    def draw_contents(self):
+        self.blit_centered(self.title_text, HEIGHT // 3)
+        bar = pygame.Rect(WIDTH // 2 - self.BAR_WIDTH // 2, HEIGHT // 2, self.BAR_WIDTH, self.BAR_HEIGHT)
+        pygame.draw.rect(game_surface, WHITE, (bar.x, bar.y, int(bar.w * self.progress), bar.h))
+        pygame.draw.rect(game_surface, WHITE, bar, 1)
+        self.blit_bottom_right(self.skip_text)
+
+class TitleScene(Scene):
+    def __init__(self):
+        super().__init__()
+        self.title_text = title_font.render("aSteroids", True, WHITE)
+        self.version_text = small_font.render("v0.81", True, GREY)
+        self.controls_text = small_font.render("Controller Ready", True, GREEN)
+        
+        # Menu buttons, in selection order
+        self.single_button = Button(WIDTH // 2 - 100, HEIGHT // 2 - 35, 200, 50, "Single Player", font)
+        self.coop_button = Button(WIDTH // 2 - 100, HEIGHT // 2 + 35, 200, 50, "Co-op Mode", font)
+        self.scores_button = Button(WIDTH // 2 - 100, HEIGHT // 2 + 105, 200, 50, "High Scores", font)
+        self.buttons = [self.single_button, self.coop_button, self.scores_button]
+        
+    def select(self, index):
+        for i, button in enumerate(self.buttons):
+            button.is_selected = i == index
+            
+    def draw_contents(self):
+        self.blit_centered(self.title_text, HEIGHT // 4)
         
-        # Position the prompts and text inputs
-        game_surface.blit(p1_prompt, (WIDTH // 2 - 150, HEIGHT // 2 - 60))
-        game_surface.blit(p2_prompt, (WIDTH // 2 - 150, HEIGHT // 2))
+        # Draw version number in bottom left corner
+        game_surface.blit(self.version_text, (10, HEIGHT - self.version_text.get_height() - 10))
         
+        # Draw controller instructions if controllers are available
+        if joystick.get_count() > 0:
+            self.blit_bottom_right(self.controls_text)
+
+class HighScoresScene(Scene):
+    def __init__(self):
+        super().__init__()
+        self.title_text = big_font.render("High Scores", True, WHITE)
+        self.back_button = Button(WIDTH // 2 - 100, HEIGHT * 3 // 4, 200, 50, "Back to Menu", font)
+        self.back_button.is_selected = True  # Always selected since it's the only button
+        self.buttons = [self.back_button]
+        self.saving_text = small_font.render("Saving score...", True, GREY)
+        self.scores = None
+        self.rows = []
+        self.saving = False
+        
+    def set_scores(self, scores, saving=False):
+        """Show a list of (name, score, date, game_mode) rows, rendering them only when they change"""
+        self.saving = saving
+        if scores == self.scores:
+            return
+        self.scores = scores
+        self.rows = []
+        for i, (name, score, date, game_mode) in enumerate(scores):
+            # Add (Coop) indicator for cooperative mode scores
+            mode_indicator = " (Coop)" if game_mode == 'coop' else ""
+            self.rows.append((font.render(f"{i+1}. {name}: {score}{mode_indicator}", True, WHITE),
+                              font.render(date, True, GREY)))
+            
+    def draw_contents(self):
+        self.blit_centered(self.title_text, HEIGHT // 8)
+        
+        y_pos = HEIGHT // 4
+        for score_text, date_text in self.rows:
+            game_surface.blit(score_text, (WIDTH // 2 - 150, y_pos))
+            game_surface.blit(date_text, (WIDTH // 2 + 100, y_pos))
+            y_pos += 40
+            
+        if self.saving:
+            self.blit_bottom_right(self.saving_text)
+
+class NameInputScene(Scene):
+    def __init__(self):
+        super().__init__()
+        self.title_text = big_font.render("Game Over", True, RED)
+        self.prompt_text = font.render("Enter your name:", True, WHITE)
+        self.p1_prompt = font.render("Player 1 name:", True, WHITE)
+        self.p2_prompt = font.render("Player 2 name:", True, CYAN)
+        self.controls_text = small_font.render("Press START to submit", True, GREEN)
+        self.submit_button = Button(WIDTH // 2 - 100, HEIGHT * 2 // 3, 200, 50, "Submit Score", font)
+        self.submit_button.is_selected = True  # Always selected since it's the only button
+        self.buttons = [self.submit_button]
+        self.text_inputs = [TextInput(WIDTH // 2 - 150, HEIGHT // 2, 300, font),
+                            TextInput(WIDTH // 2 - 150, HEIGHT // 2 + 60, 300, font)]
+        self.game_mode = SINGLE_PLAYER
+        self.score_texts = []
+        
+    def start(self, scores, game_mode, ranks=None):
+        """Set up name entry for a finished game, with each score's place on the leaderboard if known"""
+        self.game_mode = game_mode
+        places = [f" (#{rank:,})" for rank in ranks] if ranks else ["", ""]
+        if game_mode == SINGLE_PLAYER:
+            self.score_texts = [font.render(f"Your Score: {scores[0]}{places[0]}", True, WHITE)]
+        else:
+            self.score_texts = [font.render(f"Player 1 Score: {scores[0]}{places[0]}", True, WHITE),
+                                font.render(f"Player 2 Score: {scores[1]}{places[1]}", True, CYAN)]
+        for text_input in self.text_inputs:
+            text_input.text = ""
+        self.text_inputs[0].active = True
+        self.text_inputs[1].active = False  # Start with player 1 active
+        
+    def draw_contents(self):
+        self.blit_centered(self.title_text, HEIGHT // 6)
+        
+        if self.game_mode == SINGLE_PLAYER:
+            self.blit_centered(self.score_texts[0], HEIGHT // 3)
+            self.blit_centered(self.prompt_text, HEIGHT // 2 - 60)
+            inputs = self.text_inputs[:1]
+        else:
+            # Co-op mode, show both scores
+            self.blit_centered(self.score_texts[0], HEIGHT // 4)
+            self.blit_centered(self.score_texts[1], HEIGHT // 3)
+            game_surface.blit(self.p1_prompt, (WIDTH // 2 - 150, HEIGHT // 2 - 60))
+            game_surface.blit(self.p2_prompt, (WIDTH // 2 - 150, HEIGHT // 2))
+            inputs = self.text_inputs
+            
         # Update and draw text inputs
-        text_inputs[0].update()
-        text_inputs[0].draw()
+        for text_input in inputs:
+            text_input.update()
+            text_input.draw()
+            
+        # Draw controller info
+        if joystick.get_count() > 0:
+            self.blit_bottom_right(self.controls_text)
+
+def read_player_input(player_id, keys, controllers, button_states, fire_pressed):
+    """Collect one player's keyboard and controller state as an INPUT_* bitmask"""
+    bits = INPUT_FIRE if fire_pressed else 0
+    
+    # Keyboard controls (arrows/WASD for player 1, numpad for player 2)
+    if player_id == 0:
+        left = keys[pygame.K_LEFT] or keys[pygame.K_a]
+        right = keys[pygame.K_RIGHT] or keys[pygame.K_d]
+        thrust = keys[pygame.K_UP] or keys[pygame.K_w]
+        fire_held = keys[pygame.K_SPACE]
+    else:
+        left = keys[pygame.K_KP4]
+        right = keys[pygame.K_KP6]
+        thrust = keys[pygame.K_KP8]
+        fire_held = keys[pygame.K_KP0]
+        
+    # Controller controls (first controller for player 1, second if available for player 2)
+    if len(controllers) > 0:
+        controller_idx = 0 if player_id == 0 else min(1, len(controllers) - 1)
+        controller = controllers[controller_idx]
+        
+        # Left/Right with left analog stick or D-pad
+        h_axis = controller.get_axis(0)  # Left stick horizontal
+        v_axis = controller.get_axis(1)  # Left stick vertical
+        hat = controller.get_hat(0)
+        left = left or h_axis < -CONTROLLER_DEADZONE or hat[0] < 0
+        right = right or h_axis > CONTROLLER_DEADZONE or hat[0] > 0
+        
+        # Thrust with up on D-pad or forward on left analog stick
+        thrust = thrust or hat[1] > 0 or v_axis < -CONTROLLER_DEADZONE
+        
+        # Shoot with A button, tracking release so holding it fires once
+        state_key = 'fire_p1' if player_id == 0 else 'fire_p2'
+        if controller.get_button(0):
+            if not button_states[controller_idx].get(state_key):
+                button_states[controller_idx][state_key] = True
+                bits |= INPUT_FIRE
+        else:
+            button_states[controller_idx][state_key] = False
+            
+        # Hold X button for consistent rapid fire
+        fire_held = fire_held or controller.get_button(2)
+        
+    if left:
+        bits |= INPUT_LEFT
+    if right:
+        bits |= INPUT_RIGHT
+    if thrust:
+        bits |= INPUT_THRUST
+    if fire_held:
+        bits |= INPUT_FIRE_HELD
+    return bits
+
+def render_text(text_font, text, color):
+    """Rendered text surface, cached by (font, text, color)"""
+    return text_cache.get((text_font, text, color))
+
+# Recently rendered HUD strings, so unchanged text never goes through font.render
+text_cache = SpriteCache(lambda key: key[0].render(key[1], True, key[2]), max_entries=256)
+
+class HudWidget:
+    """One line of HUD text, re-rendered only when value(world) changes"""
+    def __init__(self, value, x, y, align='left'):
+        self.value = value
+        self.x = x
+        self.y = y
+        self.align = align
+        self.last_value = None
+        self.surface = None
+        
+    def draw(self, world):
+        """Draw the widget, returning the area it covers (or None when hidden)"""
+        value = self.value(world)
+        if value != self.last_value:
+            self.last_value = value
+            self.surface = render_text(font, *value) if value else None
+        if self.surface is None:
+            return None
+            
+        x = self.x
+        if self.align == 'center':
+            x -= self.surface.get_width() // 2
+        elif self.align == 'right':
+            x -= self.surface.get_width()
+        return game_surface.blit(self.surface, (x, self.y))
+
+def powerup_status(player, tick, tick_rate, label=None):
+    """HUD (text, color) for a player's active power-up or None; co-op passes a P1/P2 label"""
+    if player.is_invincible:
+        remaining = max(0, (player.invincible_duration - (tick - player.invincible_timer)) // tick_rate)
+        text = f"Invincibility: {remaining}s"
+        color = PURPLE
+    elif player.has_laser:
+        text = "Laser Ready" if label else "Laser Ready!"
+        color = (YELLOW if player.player_id == 0 else CYAN) if label else YELLOW
+    elif player.has_nuke:
+        text = "Nuke Ready" if label else "Nuclear Bomb Ready!"
+        color = GREY
+    elif player.active_powerup == 'rapid_fire':
+        text = f"Rapid Fire: {player.rapid_fire_ammo}"
+        color = RED
+    else:
+        return None
+    return (f"{label} {text}" if label else text), color
+
+def build_hud(game_mode):
+    """Widgets for the score, level, lives and power-up status of a game mode"""
+    if game_mode == SINGLE_PLAYER:
+        return [
+            HudWidget(lambda w: (f"Score: {w.scores[0]}", WHITE), 10, 10),
+            HudWidget(lambda w: (f"Level: {w.level}", WHITE), WIDTH - 10, 10, 'right'),
+            HudWidget(lambda w: (f"Lives: {w.players[0].lives}", WHITE), WIDTH // 2, 10, 'center'),
+            HudWidget(lambda w: powerup_status(w.players[0], w.tick, w.tick_rate), 10, HEIGHT - 40),
+        ]
         
-        text_inputs[1].update()
-        text_inputs[1].draw()
+    # Co-op mode UI - Player 1 on left, Player 2 on right, level in the center
+    return [
+        HudWidget(lambda w: (f"P1: {w.scores[0]}", WHITE), 10, 10),
+        HudWidget(lambda w: (f"Lives: {w.players[0].lives}", WHITE), 10, 40),
+        HudWidget(lambda w: (f"Level: {w.level}", WHITE), WIDTH // 2, 10, 'center'),
+        HudWidget(lambda w: (f"P2: {w.scores[1]}", CYAN), WIDTH - 10, 10, 'right'),
+        HudWidget(lambda w: (f"Lives: {w.players[1].lives}", CYAN), WIDTH - 10, 40, 'right'),
+        HudWidget(lambda w: powerup_status(w.players[0], w.tick, w.tick_rate, "P1"), 10, HEIGHT - 40),
+        HudWidget(lambda w: powerup_status(w.players[1], w.tick, w.tick_rate, "P2"), WIDTH - 10, HEIGHT - 40, 'right'),
+    ]
+
+huds = {}  # HUD widgets per game mode, built on first use
+
+def draw_hud(world, dirty=None):
+    """Draw score, level, lives and power-up status for a running game"""
+    if world.game_mode not in huds:
+        huds[world.game_mode] = build_hud(world.game_mode)
+    for widget in huds[world.game_mode]:
+        rect = widget.draw(world)
+        if rect and dirty is not None:
+            dirty.append(rect)
+
+class Renderer:
+    """Presents game_surface on the screen, optionally only where it changed"""
+    def __init__(self, threshold=DIRTY_RECT_THRESHOLD):
+        self.threshold = threshold
+        self.previous = None  # Rects drawn last frame, None if it was a full frame
+        self.direct = game_surface.get_parent() is screen is not None  # Nothing to copy, only bars to clear
+        self.bars_cleared = False
+        
+    def begin(self):
+        """Clear what the previous frame drew"""
+        if self.previous is None:
+            game_surface.fill(BLACK)
+        else:
+            for rect in self.previous:
+                game_surface.fill(BLACK, rect)
+                
+    def clear_letterbox(self):
+        """Black out the screen outside the game area"""
+        bottom = OFFSET_Y + HEIGHT
+        right = OFFSET_X + WIDTH
+        for bar in ((0, 0, DISPLAY_WIDTH, OFFSET_Y), (0, bottom, DISPLAY_WIDTH, DISPLAY_HEIGHT - bottom),
+                    (0, OFFSET_Y, OFFSET_X, HEIGHT), (right, OFFSET_Y, DISPLAY_WIDTH - right, HEIGHT)):
+            screen.fill(BLACK, bar)
+        self.bars_cleared = True
+        
+    def present(self, rects=None):
+        """Show the frame; rects are the areas drawn since begin(), None for all of it"""
+        limit = self.threshold * WIDTH * HEIGHT
+        bounds = game_surface.get_rect()
+        if rects is not None:
+            rects = [rect.clip(bounds) for rect in rects]
+            if sum(rect.w * rect.h for rect in rects) > limit:
+                rects = None  # Too busy; redraw this frame and the next in full
+                
+        if rects is not None and self.previous is not None and self.bars_cleared:
+            changed = [rect for rect in self.previous + rects if rect]
+            if sum(rect.w * rect.h for rect in changed) <= limit:
+                if self.direct:
+                    pygame.display.update([rect.move(OFFSET_X, OFFSET_Y) for rect in changed])
+                else:
+                    pygame.display.update([screen.blit(game_surface, (rect.x + OFFSET_X, rect.y + OFFSET_Y), rect)
+                                           for rect in changed])
+                self.previous = rects
+                return
+                
+        if not self.bars_cleared:
+            self.clear_letterbox()
+        if not self.direct:
+            # Blit the game surface to the screen at the correct position (no scaling)
+            screen.blit(game_surface, (OFFSET_X, OFFSET_Y))
+        pygame.display.flip()
+        self.previous = rects
+
+def create_app(config=None):
+    """Start pygame and bind the display, drawing surface, clock and fonts globals; returns an App"""
+    global DISPLAY_WIDTH, DISPLAY_HEIGHT, WIDTH, HEIGHT, OFFSET_X, OFFSET_Y
+    global screen, game_surface, clock, font, title_font, big_font, small_font, effects_layer, voices
+    config = config or AppConfig()
+    
+    if config.headless:
+        # Fonts are still needed for off-screen rendering
+        pygame.font.init()
+        DISPLAY_WIDTH, DISPLAY_HEIGHT = config.resolution or HEADLESS_RESOLUTION
+    else:
+        # Initialize pygame
+        pygame.init()
+        
+        # Initialize sound mixer
+        pygame.mixer.pre_init(MIXER_FREQUENCY, MIXER_SIZE, MIXER_CHANNELS, MIXER_BUFFER)
+        pygame.mixer.init()
+        voices = VoiceManager()
+        
+        # Get the actual display resolution
+        if config.resolution:
+            DISPLAY_WIDTH, DISPLAY_HEIGHT = config.resolution
+        else:
+            info = pygame.display.Info()
+            DISPLAY_WIDTH, DISPLAY_HEIGHT = info.current_w, info.current_h
+    WIDTH, HEIGHT, OFFSET_X, OFFSET_Y = letterbox(DISPLAY_WIDTH, DISPLAY_HEIGHT)
     
-    # Draw submit button
-    submit_button = Button(WIDTH // 2 - 100, HEIGHT * 2 // 3, 200, 50, "Submit Score", font)
-    submit_button.is_selected = True  # Always selected since it's the only button
-    mouse_pos = pygame.mouse.get_pos()
-    submit_button.check_hover(mouse_pos)
-    submit_button.draw()
+    # Set up the display
+    if config.headless:
+        screen = None
+        game_surface = pygame.Surface((WIDTH, HEIGHT))
+    else:
+        screen = pygame.display.set_mode((DISPLAY_WIDTH, DISPLAY_HEIGHT), pygame.FULLSCREEN if config.fullscreen else 0)
+        pygame.display.set_caption("aSteroids")
+        if config.present_mode == 'direct':
+            game_surface = screen.subsurface((OFFSET_X, OFFSET_Y, WIDTH, HEIGHT))
+        else:
+            game_surface = pygame.Surface((WIDTH, HEIGHT)).convert()  # Match the display's pixel format
+    clock = pygame.time.Clock()
     
-    # Draw controller info
-    if joystick.get_count() > 0:
-        controls_text = pygame.font.Font(None, 24).render("Press START to submit", True, GREEN)
-        game_surface.blit(controls_text, (WIDTH - controls_text.get_width() - 10, HEIGHT - controls_text.get_height() - 10))
+    # Load fonts
+    font = pygame.font.Font(None, 36)
+    title_font = pygame.font.Font(None, 72)
+    big_font = pygame.font.Font(None, 48)
+    small_font = pygame.font.Font(None, 24)
     
-    return submit_button
+    effects_layer = EffectsLayer((WIDTH, HEIGHT))
+    huds.clear()  # Widget positions depend on the playfield size
+    return App(config, screen, game_surface, clock)
 
-def main():
+def main(config=None):
+    create_app(config)
+    
+    # Load sounds in the background behind a loading screen
+    sound_loader = SoundLoader()
+    sound_loader.start()
+    
     # Initialize database
-    db_path = init_database()
+    score_store = ScoreStore()
     
     # Create background asteroids for menus
-    background_asteroids = []
-    for _ in range(8):
-        asteroid = Asteroid()
-        asteroid.velocity = [asteroid.velocity[0] * 0.3, asteroid.velocity[1] * 0.3]  # Slower movement
-        background_asteroids.append(asteroid)
+    background_asteroids = AsteroidField()
+    background_asteroids.spawn(8)
+    background_asteroids.velocity *= 0.3  # Slower movement
     
     # Initialize controllers
     controllers = init_controllers()
@@ -1261,34 +3257,34 @@ def main():
     controller_button_states = [{} for _ in range(max(1, len(controllers)))]
     controller_button_times = [{} for _ in range(max(1, len(controllers)))]
     
-    # Game objects
-    players = []  # Will contain Player objects
-    asteroids = []
-    bullets = []
-    ufos = []
-    particles = []
-    powerups = []
-    laser_beams = []  # Now a list to support multiple laser beams
+    # Game simulation and its input recording, created when a game starts
+    world = None
+    recorder = None
     
     # Game state and variables
-    game_state = TITLE_SCREEN
+    game_state = LOADING
     game_mode = SINGLE_PLAYER  # Default to single player
     scores = [0, 0]  # Player scores
-    level = 1
     selected_button_index = 0  # 0 = Single Player, 1 = Co-op, 2 = High Scores
     
-    # Create text inputs for name entry
-    text_input1 = TextInput(WIDTH // 2 - 150, HEIGHT // 2, 300, font)
-    text_input2 = TextInput(WIDTH // 2 - 150, HEIGHT // 2 + 60, 300, font)
-    text_inputs = [text_input1, text_input2]
+    # Menu screens, built once and reused
+    scenes = {
+        LOADING: LoadingScene(),
+        TITLE_SCREEN: TitleScene(),
+        HIGH_SCORES: HighScoresScene(),
+        NAME_INPUT: NameInputScene(),
+    }
+    text_inputs = scenes[NAME_INPUT].text_inputs
     
-    # Game timing variables
-    last_shot_times = [0, 0]  # One for each player
-    shot_cooldown = 250  # 250 ms between shots
-    ufo_spawn_timer = pygame.time.get_ticks()
-    ufo_spawn_delay = random.randint(10000, 20000)  # 10-20 seconds
-    powerup_spawn_timer = pygame.time.get_ticks()
-    powerup_spawn_delay = POWERUP_SPAWN_RATE * 1000  # Convert to milliseconds
+    # Nuke flash frames left to draw
+    flash_frames = 0
+    renderer = Renderer()
+    dirty = None  # Areas drawn this frame, when presenting with dirty rects
+    
+    # Fixed timestep: real frame time is banked and spent in whole simulation ticks
+    frame_time = 0.0
+    accumulator = 0.0
+    fire_pressed = [False, False]  # Fire key presses not yet seen by a tick
     
     # Print debug info
     print(f"Screen resolution: {DISPLAY_WIDTH}x{DISPLAY_HEIGHT}")
@@ -1300,11 +3296,11 @@ def main():
     while running:
         current_time = pygame.time.get_ticks()
         mouse_pos = pygame.mouse.get_pos()
+        frame_time = min(frame_time, MAX_FRAME_TIME)
         
         # FIX 2: Always update background asteroids for menu states
-        if game_state in [TITLE_SCREEN, HIGH_SCORES, NAME_INPUT]:
-            for asteroid in background_asteroids:
-                asteroid.update()
+        if game_state in [LOADING, TITLE_SCREEN, HIGH_SCORES, NAME_INPUT]:
+            background_asteroids.update(frame_time * BASE_TICK_RATE)
         
         # Handle events
         for event in pygame.event.get():
@@ -1324,8 +3320,15 @@ def main():
                 controller_button_states = [{} for _ in range(max(1, len(controllers)))]
                 controller_button_times = [{} for _ in range(max(1, len(controllers)))]
                 
+            # Any key, click or button skips the rest of the loading screen
+            if game_state == LOADING:
+                if event.type in (pygame.KEYDOWN, pygame.MOUSEBUTTONDOWN, pygame.JOYBUTTONDOWN):
+                    game_state = TITLE_SCREEN
+                    
             # Handle title screen events
-            if game_state == TITLE_SCREEN:
+            elif game_state == TITLE_SCREEN:
+                activated = None  # Index of the menu button chosen by this event
+                
                 # Check controller input for menu navigation
                 for i, controller in enumerate(controllers):
                     # Only check once per frame
@@ -1357,57 +3360,8 @@ def main():
                                 not controller_button_states[i]['select']):
                             
                             controller_button_states[i]['select'] = True
-                            play_sound('menu_select')                            
-
-                            # Single Player button
-                            if selected_button_index == 0:
-                                players = [Player()]
-                                game_mode = SINGLE_PLAYER
-                                
-                                asteroids = []
-                                bullets = []
-                                ufos = []
-                                particles = []
-                                powerups = []
-                                laser_beams = []
-                                scores = [0, 0]
-                                level = 1
-                                game_state = GAME_PLAYING
-                                
-                                # Create initial asteroids
-                                for _ in range(4):
-                                    asteroids.append(Asteroid())
-                                    
-                                ufo_spawn_timer = pygame.time.get_ticks()
-                                ufo_spawn_delay = random.randint(10000, 20000)
-                                powerup_spawn_timer = current_time
-                                
-                            # Co-op Mode button
-                            elif selected_button_index == 1:
-                                players = [Player(0), Player(1)]
-                                game_mode = COOPERATIVE
-                                
-                                asteroids = []
-                                bullets = []
-                                ufos = []
-                                particles = []
-                                powerups = []
-                                laser_beams = []
-                                scores = [0, 0]
-                                level = 1
-                                game_state = GAME_PLAYING
-                                
-                                # Create initial asteroids
-                                for _ in range(4):
-                                    asteroids.append(Asteroid())
-                                    
-                                ufo_spawn_timer = pygame.time.get_ticks()
-                                ufo_spawn_delay = random.randint(10000, 20000)
-                                powerup_spawn_timer = current_time
-                                
-                            # High Scores button
-                            else:
-                                game_state = HIGH_SCORES
+                            play_sound('menu_select')
+                            activated = selected_button_index
                         
                         # Track button release
                         elif not (controller.get_button(0) or controller.get_button(7)):
@@ -1426,110 +3380,24 @@ def main():
                     elif event.key == pygame.K_RETURN or event.key == pygame.K_SPACE:
                         play_sound('menu_select')
                         # Activate the selected button
-                        if selected_button_index == 0:
-                            # Single Player button
-                            players = [Player()]
-                            game_mode = SINGLE_PLAYER
-                            
-                            asteroids = []
-                            bullets = []
-                            ufos = []
-                            particles = []
-                            powerups = []
-                            laser_beams = []
-                            scores = [0, 0]
-                            level = 1
-                            game_state = GAME_PLAYING
-                            
-                            # Create initial asteroids
-                            for _ in range(4):
-                                asteroids.append(Asteroid())
-                                
-                            ufo_spawn_timer = pygame.time.get_ticks()
-                            ufo_spawn_delay = random.randint(10000, 20000)
-                            powerup_spawn_timer = current_time
-                            
-                        elif selected_button_index == 1:
-                            # Co-op Mode button
-                            players = [Player(0), Player(1)]
-                            game_mode = COOPERATIVE
-                            
-                            asteroids = []
-                            bullets = []
-                            ufos = []
-                            particles = []
-                            powerups = []
-                            laser_beams = []
-                            scores = [0, 0]
-                            level = 1
-                            game_state = GAME_PLAYING
-                            
-                            # Create initial asteroids
-                            for _ in range(4):
-                                asteroids.append(Asteroid())
-                            
-                            ufo_spawn_timer = pygame.time.get_ticks()
-                            ufo_spawn_delay = random.randint(10000, 20000)
-                            powerup_spawn_timer = current_time
-                            
-                        else:
-                            # High Scores button
-                            game_state = HIGH_SCORES
+                        activated = selected_button_index
                     elif event.key == pygame.K_ESCAPE:  # Exit on ESC
                         running = False
                 
                 if event.type == pygame.MOUSEBUTTONDOWN:
-                    single_button, coop_button, scores_button = draw_title_screen(background_asteroids, selected_button_index)
-                    
-                    if single_button.is_clicked(mouse_pos, event):
-                        # Start a new single player game
-                        players = [Player()]
-                        game_mode = SINGLE_PLAYER
-                        
-                        asteroids = []
-                        bullets = []
-                        ufos = []
-                        particles = []
-                        powerups = []
-                        laser_beams = []
-                        scores = [0, 0]
-                        level = 1
-                        game_state = GAME_PLAYING
-                        
-                        # Create initial asteroids
-                        for _ in range(4):
-                            asteroids.append(Asteroid())
-                            
-                        ufo_spawn_timer = pygame.time.get_ticks()
-                        ufo_spawn_delay = random.randint(10000, 20000)
-                        powerup_spawn_timer = current_time
-                    
-                    elif coop_button.is_clicked(mouse_pos, event):
-                        # Start a new co-op game
-                        players = [Player(0), Player(1)]
-                        game_mode = COOPERATIVE
-                        
-                        asteroids = []
-                        bullets = []
-                        ufos = []
-                        particles = []
-                        powerups = []
-                        laser_beams = []
-                        scores = [0, 0]
-                        level = 1
-                        game_state = GAME_PLAYING
-                        
-                        # Create initial asteroids
-                        for _ in range(4):
-                            asteroids.append(Asteroid())
-                            
-                        ufo_spawn_timer = pygame.time.get_ticks()
-                        ufo_spawn_delay = random.randint(10000, 20000)
-                        powerup_spawn_timer = current_time
+                    button = scenes[TITLE_SCREEN].clicked_button(mouse_pos, event)
+                    if button:
+                        activated = scenes[TITLE_SCREEN].buttons.index(button)
                         
-                    elif scores_button.is_clicked(mouse_pos, event):
-                        # Show high scores
-                        game_state = HIGH_SCORES
+                # Start a new game (Single Player or Co-op button) or show high scores
+                if activated == 2:
+                    game_state = HIGH_SCORES
+                elif activated is not None:
+                    game_mode = SINGLE_PLAYER if activated == 0 else COOPERATIVE
+                    world = World(game_mode)
+                    accumulator = 0.0  # Time banked in the last game is not this one's
+                    recorder = start_recording(world)
+                    game_state = GAME_PLAYING
             
             # Handle high scores screen events
             elif game_state == HIGH_SCORES:
@@ -1557,9 +3425,7 @@ def main():
                         selected_button_index = 0  # Reset to Single Player being selected
                 
                 if event.type == pygame.MOUSEBUTTONDOWN:
-                    high_scores = get_high_scores(db_path)
-                    back_button = draw_high_scores_screen(high_scores, background_asteroids)
-                    if back_button.is_clicked(mouse_pos, event):
+                    if scenes[HIGH_SCORES].clicked_button(mouse_pos, event):
                         game_state = TITLE_SCREEN
                         selected_button_index = 0  # Reset to Single Player being selected
             
@@ -1579,13 +3445,13 @@ def main():
                             # Check that names are provided
                             if game_mode == SINGLE_PLAYER:
                                 if text_inputs[0].text.strip():
-                                    save_score(db_path, text_inputs[0].text, scores[0], 'single')
+                                    score_store.save_score(text_inputs[0].text, scores[0], 'single')
                                     game_state = HIGH_SCORES
                             else:  # COOPERATIVE
                                 if text_inputs[0].text.strip() and text_inputs[1].text.strip():
                                     # Save both scores with coop mode indicator
-                                    save_score(db_path, text_inputs[0].text, scores[0], 'coop')
-                                    save_score(db_path, text_inputs[1].text, scores[1], 'coop')
+                                    score_store.submit_scores([(text_inputs[0].text, scores[0], 'coop'),
+                                                               (text_inputs[1].text, scores[1], 'coop')])
                                     game_state = HIGH_SCORES
                         
                         # Track button release
@@ -1623,18 +3489,17 @@ def main():
                         text_inputs[1].active = not text_inputs[1].active
                 
                 if event.type == pygame.MOUSEBUTTONDOWN:
-                    submit_button = draw_name_input_screen(scores, text_inputs, background_asteroids, game_mode)
-                    if submit_button.is_clicked(mouse_pos, event):
+                    if scenes[NAME_INPUT].clicked_button(mouse_pos, event):
                         # Check that names are provided
                         if game_mode == SINGLE_PLAYER:
                             if text_inputs[0].text.strip():
-                                save_score(db_path, text_inputs[0].text, scores[0], 'single')
+                                score_store.save_score(text_inputs[0].text, scores[0], 'single')
                                 game_state = HIGH_SCORES
                         else:  # COOPERATIVE
                             if text_inputs[0].text.strip() and text_inputs[1].text.strip():
                                 # Save both scores with coop mode indicator
-                                save_score(db_path, text_inputs[0].text, scores[0], 'coop')
-                                save_score(db_path, text_inputs[1].text, scores[1], 'coop')
+                                score_store.submit_scores([(text_inputs[0].text, scores[0], 'coop'),
+                                                           (text_inputs[1].text, scores[1], 'coop')])
                                 game_state = HIGH_SCORES
             
             # Handle gameplay events
@@ -1642,827 +3507,88 @@ def main():
                 if event.type == pygame.KEYDOWN:
                     # Player 1 shooting
                     if event.key == pygame.K_SPACE:
-                        if len(players) > 0 and players[0].lives > 0:
-                            # Only handle shooting if no laser beam is active for this player
-                            if not any(beam.player_id == 0 for beam in laser_beams):
-                                # If rapid fire is active, don't apply cooldown
-                                if players[0].active_powerup == 'rapid_fire' and players[0].rapid_fire_ammo > 0:
-                                    result = players[0].shoot()
-                                    if isinstance(result, Bullet):
-                                        bullets.append(result)
-                                        last_shot_times[0] = current_time
-
-                                        if hasattr(result, 'is_nuke') and result.is_nuke:
-                                            pass
-                                        else:
-                                            play_sound('shoot')
-                                    elif result == "laser":
-                                        laser_beams.append(LaserBeam(players[0]))
-                                        play_sound('laser')
-                                        
-                                # Handle shooting with cooldown for other weapons
-                                elif current_time - last_shot_times[0] > shot_cooldown:
-                                    result = players[0].shoot()
-                                    
-                                    # Handle different return types
-                                    if result == "laser":
-                                        laser_beams.append(LaserBeam(players[0]))
-                                    elif isinstance(result, Bullet):
-                                        bullets.append(result)
-                                        last_shot_times[0] = current_time
-                                        sounds['shoot'].play()  # Add this line
-					                    
+                        fire_pressed[0] = True
+                        
                     # Player 2 shooting (numpad 0)
                     elif event.key == pygame.K_KP0:
-                        if game_mode == COOPERATIVE and len(players) > 1 and players[1].lives > 0:
-                            # Only handle shooting if no laser beam is active for this player
-                            if not any(beam.player_id == 1 for beam in laser_beams):
-                                # If rapid fire is active, don't apply cooldown
-                                if players[1].active_powerup == 'rapid_fire' and players[1].rapid_fire_ammo > 0:
-                                    result = players[1].shoot()
-                                    if isinstance(result, Bullet):
-                                        bullets.append(result)
-                                        
-                                # Handle shooting with cooldown for other weapons
-                                elif current_time - last_shot_times[1] > shot_cooldown:
-                                    result = players[1].shoot()
-                                    
-                                    # Handle different return types
-                                    if result == "laser":
-                                        laser_beams.append(LaserBeam(players[1]))
-                                    elif isinstance(result, Bullet):
-                                        bullets.append(result)
-                                        last_shot_times[1] = current_time
+                        fire_pressed[1] = True
                     
                     # Escape key to return to title
                     elif event.key == pygame.K_ESCAPE:
                         stop_all_sounds()
+                        if recorder:
+                            recorder.close(world)
+                            recorder = None
                         game_state = TITLE_SCREEN
                         selected_button_index = 0
         
+        # Leave the loading screen once everything is in
+        if game_state == LOADING and sound_loader.done:
+            game_state = TITLE_SCREEN
+            
         # Draw appropriate screen based on game state
-        if game_state == TITLE_SCREEN:
-            single_button, coop_button, scores_button = draw_title_screen(background_asteroids, selected_button_index)
-        elif game_state == HIGH_SCORES:
-            high_scores = get_high_scores(db_path)
-            back_button = draw_high_scores_screen(high_scores, background_asteroids)
-        elif game_state == NAME_INPUT:
-            submit_button = draw_name_input_screen(scores, text_inputs, background_asteroids, game_mode)
+        dirty = None
+        if game_state in scenes:
+            if game_state == LOADING:
+                scenes[LOADING].progress = sound_loader.progress()
+            elif game_state == TITLE_SCREEN:
+                scenes[TITLE_SCREEN].select(selected_button_index)
+            elif game_state == HIGH_SCORES:
+                scenes[HIGH_SCORES].set_scores(score_store.high_scores(), score_store.saving())
+            scenes[game_state].draw(background_asteroids)
         
         # Only update the game if playing
         elif game_state == GAME_PLAYING:
-            # Clear the surface
-            game_surface.fill(BLACK)
-            
-            # Get keys pressed
+            # Run as many fixed ticks as the elapsed time covers
             keys = pygame.key.get_pressed()
-            
-            # Player 1 controls
-            if players[0].lives > 0:
-                # Keyboard controls
-                if keys[pygame.K_LEFT] or keys[pygame.K_a]:
-                    players[0].rotate(-1)
-                if keys[pygame.K_RIGHT] or keys[pygame.K_d]:
-                    players[0].rotate(1)
-                if keys[pygame.K_UP] or keys[pygame.K_w]:
-                    players[0].thrust()
-                    if random.random() < 0.1:
-                        play_sound('thrust')
+            tick_time = 1.0 / world.tick_rate
+            accumulator += frame_time
+            while accumulator >= tick_time:
+                inputs = [read_player_input(i, keys, controllers, controller_button_states, fire_pressed[i])
+                          for i in range(len(world.players))]
+                fire_pressed = [False, False]
+                if recorder:
+                    recorder.record(inputs)
+                world.step(inputs)
+                accumulator -= tick_time
                 
-                # Controller controls for player 1 (first available controller or assigned controller)
-                if len(controllers) > 0:
-                    controller = controllers[0]
+                if world.nuke_flash:
+                    flash_frames = 3
                     
-                    # Left/Right with left analog stick or D-pad
-                    h_axis = controller.get_axis(0)  # Left stick horizontal
-                    if abs(h_axis) > CONTROLLER_DEADZONE:
-                        players[0].rotate(-1 if h_axis < 0 else 1)
+                if world.game_over:
+                    if recorder:
+                        recorder.close(world)
+                        recorder = None
+                    game_state = NAME_INPUT
+                    mode_name = 'single' if game_mode == SINGLE_PLAYER else 'coop'
+                    scenes[NAME_INPUT].start(world.scores, game_mode,
+                                             [score_store.rank(score, mode_name) for score in world.scores])
+                    break
+            scores = world.scores
                     
-                    # D-pad for rotation
-                    if controller.get_hat(0)[0] < 0:  # D-pad left
-                        players[0].rotate(-1)
-                    elif controller.get_hat(0)[0] > 0:  # D-pad right
-                        players[0].rotate(1)
-                    
-                    # Thrust with up on D-pad or forward on left analog stick
-                    v_axis = controller.get_axis(1)  # Left stick vertical
-                    if controller.get_hat(0)[1] > 0 or v_axis < -CONTROLLER_DEADZONE:  # Up on D-pad or up on stick
-                        players[0].thrust()
-                    
-                    # Shoot with A button or right bumper
-                    button_idx = 0  # A button
-                    if (controller.get_button(button_idx) and 
-                            ('fire_p1' not in controller_button_states[0] or 
-                             not controller_button_states[0]['fire_p1'])):
-                        
-                        controller_button_states[0]['fire_p1'] = True
-                        
-                        # Only handle shooting if no laser beam is active for this player
-                        if not any(beam.player_id == 0 for beam in laser_beams):
-                            # If rapid fire is active, don't apply cooldown
-                            if players[0].active_powerup == 'rapid_fire' and players[0].rapid_fire_ammo > 0:
-                                result = players[0].shoot()
-                                if isinstance(result, Bullet):
-                                    bullets.append(result)
-                                    play_sound('shoot')
-                                    
-                            # Handle shooting with cooldown for other weapons
-                            elif current_time - last_shot_times[0] > shot_cooldown:
-                                result = players[0].shoot()
-                                
-                                # Handle different return types
-                                if result == "laser":
-                                    laser_beams.append(LaserBeam(players[0]))
-                                    play_sound('laser')
-                                elif isinstance(result, Bullet):
-                                    bullets.append(result)
-                                    
-                                    # Play sound BEFORE updating shot time
-                                    if hasattr(result, 'is_nuke') and result.is_nuke:
-                                        pass
-                                    else:
-                                        # Play sound directly to ensure it works
-                                        sounds['shoot'].play()
-                                        
-                                    # Update time AFTER playing sound
-                                    last_shot_times[0] = current_time
-                    
-                    # Track button release
-                    elif not controller.get_button(button_idx):
-                        controller_button_states[0]['fire_p1'] = False
-                    
-                    # Rapid fire handling for controller
-                    if players[0].active_powerup == 'rapid_fire' and players[0].rapid_fire_ammo > 0:
-                        # Use different button (X button) for consistent fire
-                        if controller.get_button(2):  # X button
-                            if current_time - last_shot_times[0] > 100:  # Faster firing rate
-                                result = players[0].shoot()
-                                if isinstance(result, Bullet):
-                                    bullets.append(result)
-                                    play_sound('shoot')
-                                    last_shot_times[0] = current_time
-                
-                # Rapid fire shooting for player 1 (keyboard)
-                if players[0].active_powerup == 'rapid_fire' and keys[pygame.K_SPACE] and players[0].rapid_fire_ammo > 0:
-                    if current_time - last_shot_times[0] > 100:  # Faster firing rate
-                        result = players[0].shoot()
-                        if isinstance(result, Bullet):
-                            bullets.append(result)
-                            last_shot_times[0] = current_time
-            
-            # Player 2 controls (numpad or second controller) - only in co-op mode
-            if game_mode == COOPERATIVE and len(players) > 1 and players[1].lives > 0:
-                # Keyboard controls
-                if keys[pygame.K_KP4]:  # Left
-                    players[1].rotate(-1)
-                if keys[pygame.K_KP6]:  # Right
-                    players[1].rotate(1)
-                if keys[pygame.K_KP8]:  # Up/Thrust
-                    players[1].thrust()
-                
-                # Controller controls for player 2 (second controller if available)
-                controller_idx = min(1, len(controllers) - 1) if len(controllers) > 0 else 0
-                if len(controllers) > 0:
-                    controller = controllers[controller_idx]
-                    
-                    # Left/Right with left analog stick or D-pad
-                    h_axis = controller.get_axis(0)  # Left stick horizontal
-                    if abs(h_axis) > CONTROLLER_DEADZONE:
-                        players[1].rotate(-1 if h_axis < 0 else 1)
-                    
-                    # D-pad for rotation
-                    if controller.get_hat(0)[0] < 0:  # D-pad left
-                        players[1].rotate(-1)
-                    elif controller.get_hat(0)[0] > 0:  # D-pad right
-                        players[1].rotate(1)
-                    
-                    # Thrust with up on D-pad or forward on left analog stick
-                    v_axis = controller.get_axis(1)  # Left stick vertical
-                    if controller.get_hat(0)[1] > 0 or v_axis < -CONTROLLER_DEADZONE:  # Up on D-pad or up on stick
-                        players[1].thrust()
-                    
-                    # Shoot with A button
-                    button_idx = 0  # A button
-                    if (controller.get_button(button_idx) and 
-                            ('fire_p2' not in controller_button_states[controller_idx] or 
-                             not controller_button_states[controller_idx]['fire_p2'])):
-                        
-                        controller_button_states[controller_idx]['fire_p2'] = True
-                        
-                        # Only handle shooting if no laser beam is active for this player
-                        if not any(beam.player_id == 1 for beam in laser_beams):
-                            # If rapid fire is active, don't apply cooldown
-                            if players[1].active_powerup == 'rapid_fire' and players[1].rapid_fire_ammo > 0:
-                                result = players[1].shoot()
-                                if isinstance(result, Bullet):
-                                    bullets.append(result)
-                                    play_sound('shoot')
-                                    
-                            # Handle shooting with cooldown for other weapons
-                            elif current_time - last_shot_times[1] > shot_cooldown:
-                                result = players[1].shoot()
-                                
-                                # Handle different return types
-                                if result == "laser":
-                                    laser_beams.append(LaserBeam(players[1]))
-                                    play_sound('laser')
-                                elif isinstance(result, Bullet):
-                                    bullets.append(result)
-                                    
-                                    # Play sound BEFORE updating shot time
-                                    if hasattr(result, 'is_nuke') and result.is_nuke:
-                                        pass
-                                    else:
-                                        # Play sound directly to ensure it works
-                                        sounds['shoot'].play()
-                                        
-                                    # Update time AFTER playing sound
-                                    last_shot_times[1] = current_time
-                    
-                    # Track button release
-                    elif not controller.get_button(button_idx):
-                        controller_button_states[controller_idx]['fire_p2'] = False
-                    
-                    # Rapid fire handling for controller
-                    if players[1].active_powerup == 'rapid_fire' and players[1].rapid_fire_ammo > 0:
-                        # Use different button (X button) for consistent fire
-                        if controller.get_button(2):  # X button
-                            if current_time - last_shot_times[1] > 100:  # Faster firing rate
-                                result = players[1].shoot()
-                                if isinstance(result, Bullet):
-                                    bullets.append(result)
-                                    play_sound('shoot')
-                                    last_shot_times[1] = current_time
-                
-                # Rapid fire shooting for player 2 (keyboard)
-                if players[1].active_powerup == 'rapid_fire' and keys[pygame.K_KP0] and players[1].rapid_fire_ammo > 0:
-                    if current_time - last_shot_times[1] > 100:  # Faster firing rate
-                        result = players[1].shoot()
-                        if isinstance(result, Bullet):
-                            bullets.append(result)
-                            last_shot_times[1] = current_time
-                
-            # Update players
-            for player in players:
-                if player.lives > 0:
-                    player.update()
-            
-            # Update bullets
-            for bullet in bullets[:]:
-                bullet.update()
-                
-                # Check for nuclear bomb impact
-                if bullet.is_nuke and bullet.lifetime < 56:  # Give a bit of time before nuke can explode
-                    exploded = False
-                    
-                    # Check collision with any asteroid
-                    for asteroid in asteroids[:]:
-                        if bullet.check_collision(asteroid):
-                            exploded = True
-                            break
-                            
-                    # Check collision with any UFO
-                    for ufo in ufos[:]:
-                        if ufo.check_collision(bullet):
-                            if len(ufos) == 1:
-                                stop_sound('ufo')
-                            exploded = True
-                            play_sound('explosion_medium')
-                            break
-                            
-                    # If nuke exploded or lifetime is almost over, trigger nuclear explosion
-                    if exploded or bullet.lifetime < 4:
-                        # Stop the nuke firing sound if it's playing
-                        if bullet.sound_channel:
-                            bullet.sound_channel.stop()
-
-                        # Play the nuke explosion sound
-                        play_sound('nuke')
-
-                        # Flash screen
-                        white_surface = pygame.Surface((WIDTH, HEIGHT))
-                        white_surface.fill(WHITE)
-                        game_surface.blit(white_surface, (0, 0))                        
-                                        
-                        # Scale and display for the flash effect
-                        screen.fill(BLACK)
-                        screen.blit(game_surface, (OFFSET_X, OFFSET_Y))
-                        pygame.display.flip()
-                        pygame.time.delay(50)  # Flash duration
-                        
-                        # Generate explosion particles
-                        for _ in range(100):
-                            particles.append(Particle(
-                                random.randint(0, WIDTH),
-                                random.randint(0, HEIGHT),
-                                random.choice([RED, YELLOW, WHITE])
-                            ))
-                        
-                        # Credit points to the player who fired the bullet
-                        player_id = bullet.player_id
-                        
-                        # Destroy all asteroids and UFOs on screen
-                        for asteroid in asteroids[:]:
-                            # Add score to the appropriate player
-                            players[player_id].score += (4 - asteroid.size) * 100
-                            scores[player_id] += (4 - asteroid.size) * 100
-                            
-                            particles.extend(create_explosion(asteroid.position[0], asteroid.position[1], asteroid.size))
-                        asteroids.clear()
-                        
-                        for ufo in ufos[:]:
-                            # Add score to the appropriate player
-                            players[player_id].score += 1000
-                            scores[player_id] += 1000
-                            
-                            particles.extend(create_explosion(ufo.position[0], ufo.position[1], 2))
-                        ufos.clear()
-                        
-                        # Remove all bullets except the nuke
-                        for b in bullets[:]:
-                            if b != bullet:
-                                bullets.remove(b)
-                        
-                        # Remove the nuke
-                        bullets.remove(bullet)
-                        break
-                    
-                if bullet.is_dead():
-                    bullets.remove(bullet)
+            # Draw everything between the last two ticks
+            renderer.begin()
+            dirty = [] if DIRTY_RECTS else None
+            world.draw(min(accumulator / tick_time, 1.0), dirty)
+            draw_hud(world, dirty)
             
-            # Update laser beams
-            for laser_beam in laser_beams[:]:
-                player_id = laser_beam.player_id
-                
-                # Check for asteroid destruction by laser
-                for asteroid in asteroids[:]:
-                    if laser_beam.check_collision(asteroid):
-                        # Play the appropriate explosion sound based on asteroid size
-                        if asteroid.size == 3:  # Large
-                            play_sound('explosion_large')
-                        elif asteroid.size == 2:  # Medium
-                            play_sound('explosion_medium')
-                        else:  # Small
-                            play_sound('explosion_small')
-                            
-                        # Add score to the appropriate player
-                        players[player_id].score += (4 - asteroid.size) * 100
-                        scores[player_id] += (4 - asteroid.size) * 100
-                        
-                        # Create an explosion effect
-                        particles.extend(create_explosion(
-                            asteroid.position[0], asteroid.position[1], asteroid.size,
-                            YELLOW if player_id == 0 else CYAN
-                        ))
-                        
-                        # Break the asteroid
-                        fragments = asteroid.break_apart()
-                        asteroids.extend(fragments)
-                        
-                        # Remove the asteroid
-                        asteroids.remove(asteroid)
-                                        
-                # Check for UFO destruction by laser
-                for ufo in ufos[:]:
-                    if laser_beam.check_collision(ufo):
-                        # Add score to the appropriate player
-                        players[player_id].score += 1000
-                        scores[player_id] += 1000
-                        
-                        # Create an explosion effect
-                        particles.extend(create_explosion(
-                            ufo.position[0], ufo.position[1], 2,
-                            YELLOW if player_id == 0 else CYAN
-                        ))
-                        
-                        # Remove the UFO
-                        ufos.remove(ufo)
-                
-                # Update laser beam
-                if laser_beam.update():
-                    laser_beams.remove(laser_beam)
-                    
-            # Update powerups
-            for powerup in powerups[:]:
-                powerup_collected = False
-                
-                if powerup.update():
-                    powerups.remove(powerup)
-                    continue
-                    
-                # Check if any player collected the powerup
-                for player in players:
-                    if player.lives > 0 and powerup.check_collision(player):
-                        # Player collected the powerup
-                        player.collect_powerup(powerup.type)
-                        # Create particle effect
-                        particles.extend(create_explosion(
-                            powerup.x, powerup.y, 2, 
-                            PowerUp.COLORS[powerup.type]
-                        ))
-                        powerup_collected = True
-                        break
-                        
-                if powerup_collected:
-                    powerups.remove(powerup)
-                    
-            # Update asteroids
-            for asteroid in asteroids[:]:
-                asteroid.update()
-                
-                # Check collision with players
-                for p_idx, player in enumerate(players):
-                    if player.lives <= 0:
-                        continue
-                        
-                    if player.check_collision(asteroid):
-                        player.lives -= 1
-                        play_sound('player_explosion')  # Player explosion sound
-                        particles.extend(create_explosion(player.position[0], player.position[1], 2))
-                        
-                        # Check for game over - only if lives reach zero
-                        if (game_mode == SINGLE_PLAYER and player.lives <= 0) or all(p.lives <= 0 for p in players):
-                            game_state = NAME_INPUT
-                            text_inputs[0].text = ""
-                            text_inputs[0].active = True
-                            if game_mode == COOPERATIVE:
-                                text_inputs[1].text = ""
-                                text_inputs[1].active = False  # Start with player 1 active
-                        else:
-                            # Only respawn if the player still has lives
-                            if player.lives > 0:
-                                player.respawn()
-                        
-                        # Play explosion sound for asteroid
-                        if asteroid.size == 3:  # Large
-                            play_sound('explosion_large')
-                        elif asteroid.size == 2:  # Medium
-                            play_sound('explosion_medium')
-                        else:  # Small
-                            play_sound('explosion_small')
-                            
-                        # Create an explosion effect
-                        particles.extend(create_explosion(asteroid.position[0], asteroid.position[1], asteroid.size))
-                            
-                        # Remove the asteroid
-                        asteroids.remove(asteroid)
-                        break
-                
-                    # Check if invincible player rammed into asteroid
-                    elif player.is_invincible:
-                        # Calculate distance
-                        distance = math.sqrt((player.position[0] - asteroid.position[0])**2 + 
-                                            (player.position[1] - asteroid.position[1])**2)
-                        if distance < player.radius + asteroid.radius:
-                            # Play the appropriate explosion sound based on asteroid size
-                            if asteroid.size == 3:  # Large
-                                sounds['explosion_large'].play()
-                            elif asteroid.size == 2:  # Medium
-                                sounds['explosion_medium'].play()
-                            else:  # Small
-                                sounds['explosion_small'].play()
-                                
-                            # Add score to the player
-                            player.score += (4 - asteroid.size) * 100
-                            scores[p_idx] += (4 - asteroid.size) * 100
-                            
-                            # Create an explosion effect with player color
-                            color = PURPLE  # Base invincibility color
-                            if p_idx == 1:  # Blend with player 2 color for more distinct effect
-                                color = (128, 0, 255)  # Blend of purple and cyan
-                                
-                            particles.extend(create_explosion(asteroid.position[0], asteroid.position[1], asteroid.size, color))
-                            
-                            # Break the asteroid
-                            fragments = asteroid.break_apart()
-                            asteroids.extend(fragments)
-                            
-                            # Remove the asteroid
-                            asteroids.remove(asteroid)
-                            break
-                
-                # Skip further checks if asteroid was removed
-                if asteroid not in asteroids:
-                    continue
-                    
-                # FIX 3: Check bullet collisions with enhanced collision detection 
-                for bullet in bullets[:]:
-                    # Use continuous collision detection for small asteroids
-                    collides = False
-                    if asteroid.size == 1:  # Small asteroid
-                        collides = bullet.line_collision(asteroid)
-                    else:  # Medium or large asteroid
-                        collides = bullet.check_collision(asteroid)
-                        
-                    if collides:
-                        # Get player who fired the bullet
-                        player_id = bullet.player_id
-                        stop_sound('nuke_fire')
-                        
-                        # Add score to the appropriate player
-                        players[player_id].score += (4 - asteroid.size) * 100
-                        scores[player_id] += (4 - asteroid.size) * 100
-                        
-                        # Create an explosion effect
-                        particles.extend(create_explosion(asteroid.position[0], asteroid.position[1], asteroid.size))
+            # Flash screen after a nuke
+            if flash_frames > 0:
+                game_surface.fill(WHITE)
+                flash_frames -= 1
+                dirty = None
 
-                        play_sound('explosion_medium')
-                        
-                        # Break the asteroid
-                        fragments = asteroid.break_apart()
-                        asteroids.extend(fragments)
-                        
-                        # Remove the bullet and asteroid
-                        if bullet in bullets:
-                            bullets.remove(bullet)
-                        asteroids.remove(asteroid)
-                        break
-
-            # Update UFOs
-            for ufo in ufos[:]:
-                ufo_bullet = ufo.update(players)  # Pass all players for UFO targeting
-                
-                # Check if the UFO is off-screen
-                if ufo.is_off_screen():
-                    ufos.remove(ufo)
-                    continue
-                    
-                # Check collision with players
-                for p_idx, player in enumerate(players):
-                    if player.lives <= 0:
-                        continue
-                        
-                    if ufo.check_collision(player) and not player.is_invincible:
-                        player.lives -= 1
-                        particles.extend(create_explosion(player.position[0], player.position[1], 2))
-                        particles.extend(create_explosion(ufo.position[0], ufo.position[1], 2))
-                        
-                        # Check for game over - only if lives reach zero
-                        if (game_mode == SINGLE_PLAYER and player.lives <= 0) or all(p.lives <= 0 for p in players):
-                            game_state = NAME_INPUT
-                            text_inputs[0].text = ""
-                            text_inputs[0].active = True
-                            if game_mode == COOPERATIVE:
-                                text_inputs[1].text = ""
-                                text_inputs[1].active = False  # Start with player 1 active
-                        else:
-                            # Only respawn if the player still has lives
-                            if player.lives > 0:
-                                player.respawn()
-                        
-                        ufos.remove(ufo)
-                        break
-                    
-                    # Check if invincible player rammed into UFO
-                    elif player.is_invincible:
-                        distance = math.sqrt((player.position[0] - ufo.position[0])**2 + 
-                                            (player.position[1] - ufo.position[1])**2)
-                        if distance < player.radius + ufo.radius:
-                            # Add score to the player
-                            player.score += 1000
-                            scores[p_idx] += 1000
-                            
-                            # Create an explosion effect
-                            color = PURPLE
-                            if p_idx == 1:  # Player 2
-                                color = (128, 0, 255)  # Blend of purple and cyan
-                                
-                            particles.extend(create_explosion(ufo.position[0], ufo.position[1], 2, color))
-                            
-                            # Remove the UFO
-                            ufos.remove(ufo)
-                            break
-                
-                # Skip if UFO was removed
-                if ufo not in ufos:
-                    continue
-                    
-                # Check bullet collisions
-                for bullet in bullets[:]:
-                    # Only check player bullets against UFOs (ignore UFO bullets)
-                    if bullet.source != "ufo" and ufo.check_collision(bullet):
-                        # Get player who fired the bullet
-                        player_id = bullet.player_id
-                        
-                        # Add score to the appropriate player
-                        players[player_id].score += 1000
-                        scores[player_id] += 1000
-                        
-                        # Create an explosion effect
-                        particles.extend(create_explosion(ufo.position[0], ufo.position[1], 2))
-                        stop_sound('ufo')
-                        play_sound('ufo_explosion')
-                        play_sound('player_explosion')
-                        
-                        # Remove the bullet and UFO
-                        if bullet in bullets:
-                            bullets.remove(bullet)
-                        ufos.remove(ufo)
-                        stop_sound('ufo')
-                        break
-                        
-                # UFO shooting
-                if ufo in ufos and ufo_bullet:  # Make sure it wasn't removed
-                    bullets.append(ufo_bullet)
-                    play_sound('ufo_shoot')
-            
-            # Update particles
-            for particle in particles[:]:
-                particle.update()
-                if particle.is_dead():
-                    particles.remove(particle)
-                    
-            # Check if level is complete
-            if len(asteroids) == 0:
-                stop_sound('ufo')
-                play_sound('menu_select')
-                level += 1
-                
-                # In co-op mode, if a player was dead but at least one player survived
-                if game_mode == COOPERATIVE:
-                    for player in players:
-                        if player.lives <= 0:
-                            # Revive them with 1 life at the start of the new level
-                            player.lives = 1
-                            player.respawn()
-                
-                # Spawn more asteroids each level
-                for _ in range(4 + level):
-                    # Make sure asteroids don't spawn directly on the player
-                    while True:
-                        asteroid = Asteroid()
-                        # Check distance to all active players
-                        safe = True
-                        for player in players:
-                            if player.lives > 0:
-                                dx = asteroid.position[0] - player.position[0]
-                                dy = asteroid.position[1] - player.position[1]
-                                dist = math.sqrt(dx*dx + dy*dy)
-                                if dist < 100:  # Safe distance
-                                    safe = False
-                                    break
-                        if safe:
-                            break
-                    asteroids.append(asteroid)
+        # Start the sounds this frame asked for
+        if voices is not None:
+            voices.flush()
             
-            # Spawn UFO if it's time
-            if current_time - ufo_spawn_timer > ufo_spawn_delay and len(ufos) < 1:
-                ufos.append(UFO())
-                play_sound('ufo')
-                ufo_spawn_timer = current_time
-                ufo_spawn_delay = random.randint(10000, 20000)  # 10-20 seconds
-                
-            # Spawn power-up if it's time
-            if current_time - powerup_spawn_timer > powerup_spawn_delay and len(powerups) < 2:
-                # Choose a location away from all players
-                while True:
-                    x = random.randint(50, WIDTH - 50)
-                    y = random.randint(50, HEIGHT - 50)
-                    
-                    # Check distance to all active players
-                    safe = True
-                    for player in players:
-                        if player.lives > 0:
-                            dx = x - player.position[0]
-                            dy = y - player.position[1]
-                            dist = math.sqrt(dx*dx + dy*dy)
-                            if dist < 100:  # Safe distance
-                                safe = False
-                                break
-                    if safe:
-                        break
-                        
-                powerups.append(PowerUp(x, y))
-                powerup_spawn_timer = current_time
-                powerup_spawn_delay = POWERUP_SPAWN_RATE * 1000  # Convert to milliseconds
-
-            # Draw everything
-            for player in players:
-                if player.lives > 0:
-                    player.draw()
-
-            # Draw laser beams if active
-            for laser_beam in laser_beams:
-                laser_beam.draw()
-                
-            # Draw bullets
-            for bullet in bullets:
-                bullet.draw()
-                
-            # Draw asteroids
-            for asteroid in asteroids:
-                asteroid.draw()
-                
-            # Draw UFOs
-            for ufo in ufos:
-                ufo.draw()
-                
-            # Draw powerups
-            for powerup in powerups:
-                powerup.draw()
-                
-            # Draw particles
-            for particle in particles:
-                particle.draw()
-
-            # Draw UI based on game mode
-            if game_mode == SINGLE_PLAYER:
-                # Draw score centered at top
-                score_text = font.render(f"Score: {scores[0]}", True, WHITE)
-                level_text = font.render(f"Level: {level}", True, WHITE)
-                lives_text = font.render(f"Lives: {players[0].lives}", True, WHITE)
-                
-                # Position UI elements
-                game_surface.blit(score_text, (10, 10))
-                game_surface.blit(level_text, (WIDTH - level_text.get_width() - 10, 10))
-                game_surface.blit(lives_text, (WIDTH // 2 - lives_text.get_width() // 2, 10))
-                
-                # Draw power-up status
-                if players[0].is_invincible:
-                    remaining = 10 - (current_time - players[0].invincible_timer) // 1000
-                    power_text = font.render(f"Invincibility: {max(0, remaining)}s", True, PURPLE)
-                    game_surface.blit(power_text, (10, HEIGHT - 40))
-                elif players[0].has_laser:
-                    power_text = font.render("Laser Ready!", True, YELLOW)
-                    game_surface.blit(power_text, (10, HEIGHT - 40))
-                elif players[0].has_nuke:
-                    power_text = font.render("Nuclear Bomb Ready!", True, GREY)
-                    game_surface.blit(power_text, (10, HEIGHT - 40))
-                elif players[0].active_powerup == 'rapid_fire':
-                    power_text = font.render(f"Rapid Fire: {players[0].rapid_fire_ammo}", True, RED)
-                    game_surface.blit(power_text, (10, HEIGHT - 40))
-            else:
-                # Co-op mode UI - Player 1 on left, Player 2 on right
-                
-                # Player 1 UI (left side)
-                p1_score_text = font.render(f"P1: {scores[0]}", True, WHITE)
-                p1_lives_text = font.render(f"Lives: {players[0].lives}", True, WHITE)
-                
-                # Player 2 UI (right side)
-                p2_score_text = font.render(f"P2: {scores[1]}", True, CYAN)
-                p2_lives_text = font.render(f"Lives: {players[1].lives}", True, CYAN)
-                
-                # Level (center)
-                level_text = font.render(f"Level: {level}", True, WHITE)
-                
-                # Position UI elements
-                game_surface.blit(p1_score_text, (10, 10))
-                game_surface.blit(p1_lives_text, (10, 40))
-                
-                game_surface.blit(level_text, (WIDTH // 2 - level_text.get_width() // 2, 10))
-                
-                game_surface.blit(p2_score_text, (WIDTH - p2_score_text.get_width() - 10, 10))
-                game_surface.blit(p2_lives_text, (WIDTH - p2_lives_text.get_width() - 10, 40))
-                
-                # Draw power-up statuses at bottom
-                # Player 1 (left side)
-                y_pos = HEIGHT - 40
-                if players[0].is_invincible:
-                    remaining = 10 - (current_time - players[0].invincible_timer) // 1000
-                    p1_power_text = font.render(f"P1 Invincibility: {max(0, remaining)}s", True, PURPLE)
-                    game_surface.blit(p1_power_text, (10, y_pos))
-                    y_pos -= 30
-                elif players[0].has_laser:
-                    p1_power_text = font.render("P1 Laser Ready", True, YELLOW)
-                    game_surface.blit(p1_power_text, (10, y_pos))
-                    y_pos -= 30
-                elif players[0].has_nuke:
-                    p1_power_text = font.render("P1 Nuke Ready", True, GREY)
-                    game_surface.blit(p1_power_text, (10, y_pos))
-                    y_pos -= 30
-                elif players[0].active_powerup == 'rapid_fire':
-                    p1_power_text = font.render(f"P1 Rapid Fire: {players[0].rapid_fire_ammo}", True, RED)
-                    game_surface.blit(p1_power_text, (10, y_pos))
-                    y_pos -= 30
-                
-                # Player 2 (right side)
-                y_pos = HEIGHT - 40
-                if players[1].is_invincible:
-                    remaining = 10 - (current_time - players[1].invincible_timer) // 1000
-                    p2_power_text = font.render(f"P2 Invincibility: {max(0, remaining)}s", True, PURPLE)
-                    game_surface.blit(p2_power_text, (WIDTH - p2_power_text.get_width() - 10, y_pos))
-                    y_pos -= 30
-                elif players[1].has_laser:
-                    p2_power_text = font.render("P2 Laser Ready", True, CYAN)
-                    game_surface.blit(p2_power_text, (WIDTH - p2_power_text.get_width() - 10, y_pos))
-                    y_pos -= 30
-                elif players[1].has_nuke:
-                    p2_power_text = font.render("P2 Nuke Ready", True, GREY)
-                    game_surface.blit(p2_power_text, (WIDTH - p2_power_text.get_width() - 10, y_pos))
-                    y_pos -= 30
-                elif players[1].active_powerup == 'rapid_fire':
-                    p2_power_text = font.render(f"P2 Rapid Fire: {players[1].rapid_fire_ammo}", True, RED)
-                    game_surface.blit(p2_power_text, (WIDTH - p2_power_text.get_width() - 10, y_pos))
-                    y_pos -= 30
-
-        # Blit the game surface to the screen at the correct position (no scaling)
-        screen.fill(BLACK)
-        screen.blit(game_surface, (OFFSET_X, OFFSET_Y))
-        
         # Update the display
-        pygame.display.flip()
-        clock.tick(FPS)
+        renderer.present(dirty)
+        frame_time = clock.tick(FPS) / 1000.0
     
+    if recorder:
+        recorder.close(world)
+    score_store.close()
     pygame.quit()
     sys.exit()
 
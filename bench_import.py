@@ -0,0 +1,61 @@
+"""Import time check.
+
+Imports asteroids_complete in fresh interpreters and reports the best
+time, both in total (mostly pygame and NumPy) and for the module's own
+code. Exits non-zero if either is over budget, or if importing started
+pygame or opened a window, which is create_app's job:
+
+    python bench_import.py [own_budget_ms] [total_budget_ms]
+"""
+import os
+import subprocess
+import sys
+
+RUNS = 5
+
+CHECK_SIDE_EFFECTS = """
+import asteroids_complete, pygame
+if pygame.get_init() or pygame.display.get_init() or pygame.mixer.get_init():
+    raise SystemExit("importing asteroids_complete initialized pygame")
+"""
+
+
+def import_times():
+    """(own, total) microseconds for one import, from -X importtime"""
+    env = dict(os.environ, PYGAME_HIDE_SUPPORT_PROMPT='1')
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import asteroids_complete'],
+                            capture_output=True, text=True, env=env, check=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__)))
+    for line in result.stderr.splitlines():
+        fields = line.split('|')
+        if len(fields) == 3 and fields[2].strip() == 'asteroids_complete':
+            return int(fields[0].split(':')[1]), int(fields[1])
+    raise RuntimeError("asteroids_complete missing from -X importtime output")
+
+
+def main():
+    own_budget = float(sys.argv[1]) if len(sys.argv) > 1 else 50
+    total_budget = float(sys.argv[2]) if len(sys.argv) > 2 else 1500
+
+    times = [import_times() for _ in range(RUNS)]
+    own = min(own for own, _ in times) / 1000
+    total = min(total for _, total in times) / 1000
+    print(f"import asteroids_complete: {total:.1f} ms total (budget {total_budget:.0f}), "
+          f"{own:.1f} ms own code (budget {own_budget:.0f}), best of {RUNS}")
+
+    failures = []
+    if own > own_budget:
+        failures.append("own import time over budget")
+    if total > total_budget:
+        failures.append("total import time over budget")
+    check = subprocess.run([sys.executable, '-c', CHECK_SIDE_EFFECTS], capture_output=True, text=True,
+                           cwd=os.path.dirname(os.path.abspath(__file__)))
+    if check.returncode:
+        failures.append(check.stderr.strip().splitlines()[-1])
+    for failure in failures:
+        print("FAIL:", failure)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""High score database benchmark.
+
+Fills a throwaway database with synthetic scores and times the queries
+the menus make against it: opening the store, the top ten, ranking a
+fresh score and paging deep into a game mode:
+
+    python bench_leaderboard.py [rows]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+os.environ['ASTEROIDS_HEADLESS'] = '1'
+
+import asteroids_complete as game
+
+
+def synthetic_rows(count):
+    """Scores in steps of 100, most games short, a few very long"""
+    for i in range(count):
+        score = int(random.expovariate(1 / 8000)) // 100 * 100
+        yield f"P{i % 1000}", score, "2024-01-01 12:00:00", 'coop' if random.random() < 0.3 else 'single'
+
+
+def timed(label, function, repeat=1):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = function()
+    elapsed = (time.perf_counter() - start) / repeat
+    print(f"{label:<28} {elapsed * 1000:9.3f} ms")
+    return result
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'scores.db')
+        store = game.ScoreStore(path)
+        start = time.perf_counter()
+        with store.conn:
+            store.conn.executemany(game.ScoreStore.INSERT_SCORE, synthetic_rows(rows))
+        print(f"filled {rows} rows in {time.perf_counter() - start:.2f}s")
+        store.close()
+
+        store = timed("open", lambda: game.ScoreStore(path))
+        timed("top 10, first", store.high_scores)
+        timed("top 10, cached", store.high_scores, repeat=1000)
+        timed("top 10 coop", lambda: store.high_scores(game_mode='coop'), repeat=1000)
+        timed("rank, first", lambda: store.rank(5000))
+        rank = timed("rank", lambda: store.rank(5000), repeat=1000)
+        print(f"  a score of 5000 places #{rank:,} of {store.ranks.total('single'):,}")
+
+        store.save_score("NEW", 5000)
+        store.writer.close()  # Wait for the commit so the next rank has a row to catch up on
+        timed("rank after a save", lambda: store.rank(5000))
+        timed("COUNT(*) rank, for scale", lambda: store.execute(
+            "SELECT COUNT(*) FROM high_scores WHERE game_mode = 'single' AND score > 5000").fetchone())
+
+        after = None
+        timed("first page", lambda: store.page('single'))
+        start = time.perf_counter()
+        for _ in range(1000):
+            page, after = store.page('single', after)
+        print(f"{'1000 pages of 10':<28} {(time.perf_counter() - start) * 1000:9.3f} ms")
+        timed("page 1001", lambda: store.page('single', after), repeat=100)
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
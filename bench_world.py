@@ -0,0 +1,51 @@
+"""Headless simulation benchmark.
+
+Runs the GAME_PLAYING simulation without a window or sound and reports
+how many ticks per second it manages, plus bullet pool allocation
+statistics:
+
+    python bench_world.py [ticks] [single|coop]
+"""
+import os
+import random
+import sys
+import time
+
+os.environ['ASTEROIDS_HEADLESS'] = '1'
+
+import asteroids_complete as game
+
+
+def random_inputs(num_players):
+    """Mash buttons the way a restless player would"""
+    inputs = []
+    for _ in range(num_players):
+        bits = random.choice([0, game.INPUT_LEFT, game.INPUT_RIGHT])
+        if random.random() < 0.5:
+            bits |= game.INPUT_THRUST
+        if random.random() < 0.2:
+            bits |= game.INPUT_FIRE
+        inputs.append(bits)
+    return inputs
+
+
+def main():
+    ticks = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    mode = game.COOPERATIVE if len(sys.argv) > 2 and sys.argv[2] == 'coop' else game.SINGLE_PLAYER
+
+    world = game.World(mode)
+    games = 1
+    start = time.perf_counter()
+    for _ in range(ticks):
+        world.step(random_inputs(len(world.players)))
+        if world.game_over:
+            world = game.World(mode)
+            games += 1
+    elapsed = time.perf_counter() - start
+
+    print(f"{ticks} ticks in {elapsed:.2f}s ({ticks / elapsed:.0f} ticks/s, {games} games)")
+    print("bullet pool:", ", ".join(f"{name} {value}" for name, value in game.bullet_pool.stats().items()))
+
+
+if __name__ == "__main__":
+    main()
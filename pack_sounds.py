@@ -0,0 +1,44 @@
+"""Sound archive builder.
+
+Decodes every effect in sounds/ once, converted to the mixer format the
+game asks for, and packs the raw samples into sounds/effects.pak. The game
+maps that one file at startup instead of decoding each WAV:
+
+    python pack_sounds.py [output]
+
+Re-run it after changing a WAV or the MIXER_* settings; the game falls
+back to the WAV files while the archive is missing or out of date.
+"""
+import os
+import sys
+import time
+
+os.environ['ASTEROIDS_HEADLESS'] = '1'
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')  # No sound card needed to convert samples
+
+import pygame
+
+import asteroids_complete as game
+
+
+def main():
+    output = sys.argv[1] if len(sys.argv) > 1 else game.SOUND_ARCHIVE
+
+    # Insist on exactly the format the game requests, so SDL converts for us
+    pygame.mixer.init(game.MIXER_FREQUENCY, game.MIXER_SIZE, game.MIXER_CHANNELS, game.MIXER_BUFFER,
+                      allowedchanges=0)
+    mixer_format = pygame.mixer.get_init()
+
+    start = time.perf_counter()
+    samples = {}
+    for name in game.SOUND_VOLUMES:
+        samples[name] = pygame.mixer.Sound(os.path.join(game.SOUND_DIR, name + '.wav')).get_raw()
+    game.SoundArchive.write(output, mixer_format, samples)
+
+    size = sum(len(data) for data in samples.values())
+    print(f"Packed {len(samples)} sounds ({size / 1024:.0f} KiB at {mixer_format}) "
+          f"into {output} in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
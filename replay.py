@@ -0,0 +1,54 @@
+"""Replay a recorded game.
+
+Re-runs the GAME_PLAYING simulation headless from a recording in
+replays/ (the newest one by default), as fast as it will go, and checks
+the state it ends in against the digest the game recorded. Exits non-zero
+if the replay went out of step:
+
+    python replay.py [recording]
+"""
+import glob
+import os
+import sys
+import time
+
+os.environ['ASTEROIDS_HEADLESS'] = '1'
+
+import asteroids_complete as game
+
+
+def main():
+    if len(sys.argv) > 1:
+        path = sys.argv[1]
+    else:
+        recordings = glob.glob(os.path.join(game.REPLAY_DIR, '*.replay'))
+        if not recordings:
+            sys.exit(f"No recordings in {game.REPLAY_DIR}")
+        path = max(recordings, key=os.path.getmtime)
+
+    replay = game.Replay(path)
+    game.create_app(game.AppConfig(headless=True, resolution=replay.resolution))
+    mode = 'single' if replay.game_mode == game.SINGLE_PLAYER else 'coop'
+    played = replay.ticks / replay.tick_rate
+    width, height = replay.resolution
+    print(f"{path}: {mode} on {width}x{height}, seed {replay.seed}, {replay.ticks} ticks "
+          f"({played / 60:.1f} min at {replay.tick_rate} Hz), {len(replay.runs)} input changes, "
+          f"{os.path.getsize(path) / 1024:.1f} KiB")
+
+    start = time.perf_counter()
+    world = replay.play()
+    elapsed = time.perf_counter() - start
+    print(f"replayed in {elapsed:.2f}s ({played / elapsed:.0f}x real time), "
+          f"level {world.level}, scores {world.scores[:len(world.players)]}")
+
+    if replay.digest is None:
+        print("recording was cut short; nothing to check the final state against")
+    elif world.digest() == replay.digest:
+        print("final state matches the recording")
+    else:
+        print("FAIL: final state differs from the recording")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()